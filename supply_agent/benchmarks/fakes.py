@@ -0,0 +1,314 @@
+"""
+Çevrimdışı benchmark için yerel taklitler: bellek içi MongoDB ve NewsAPI + makale
+sayfalarını sunan yerel HTTP sunucusu. Sahte LLM (LLM_BACKEND=fake), sahte browser
+agent ve StubGmailService ilgili modüllerde tanımlıdır.
+"""
+import copy
+import json
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# --- Bellek içi MongoDB ---
+
+
+def _get_path(document, field):
+    """'messages.3.content' gibi noktalı yolları çözer; yol yoksa None döner."""
+    value = document
+    for part in field.split("."):
+        if isinstance(value, list) and part.isdigit():
+            value = value[int(part)] if int(part) < len(value) else None
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+    return value
+
+
+def _evaluate(expression, document):
+    """Güncelleme pipeline'ında kullanılan ifadelerin ($add, $ifNull, $max, $size, $slice) alt kümesi."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        return _get_path(document, expression[1:])
+    if isinstance(expression, dict) and len(expression) == 1:
+        operator, operands = next(iter(expression.items()))
+        operands = operands if isinstance(operands, list) else [operands]
+        values = [_evaluate(operand, document) for operand in operands]
+        if operator == "$add":
+            return sum(values)
+        if operator == "$ifNull":
+            return values[0] if values[0] is not None else values[1]
+        if operator == "$max":
+            return max(values)
+        if operator == "$size":
+            return len(values[0])
+        if operator == "$slice":
+            array, position, count = values
+            return array[position:position + count]
+        raise NotImplementedError(f"Desteklenmeyen ifade: {operator}")
+    return expression
+
+
+def _matches(document, query):
+    for field, condition in query.items():
+        value = _get_path(document, field) if "." in field else document.get(field)
+        if isinstance(condition, dict) and any(key.startswith("$") for key in condition):
+            for operator, operand in condition.items():
+                if operator == "$in":
+                    if value not in operand:
+                        return False
+                elif operator == "$ne":
+                    if value == operand or (isinstance(value, list) and operand in value):
+                        return False
+                elif operator == "$exists":
+                    if (field in document) != operand:
+                        return False
+                else:
+                    raise NotImplementedError(f"Desteklenmeyen sorgu operatörü: {operator}")
+        elif isinstance(value, list):
+            if condition not in value:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def _project(document, projection):
+    if not projection:
+        return copy.deepcopy(document)
+    included = {key for key, flag in projection.items() if flag and key != "_id"}
+    result = {key: copy.deepcopy(value) for key, value in document.items() if key in included}
+    if projection.get("_id", 1):
+        result["_id"] = document["_id"]
+    return result
+
+
+def _apply_update(document, update, inserting):
+    if isinstance(update, list):
+        # Bir $set aşamasındaki tüm ifadeler aşamanın girdisindeki dokümana göre hesaplanır.
+        for stage in update:
+            values = {field: _evaluate(expression, document) for field, expression in stage["$set"].items()}
+            document.update(copy.deepcopy(values))
+        return
+    for operator, fields in update.items():
+        for field, value in fields.items():
+            if operator == "$set" or (operator == "$setOnInsert" and inserting):
+                document[field] = copy.deepcopy(value)
+            elif operator == "$setOnInsert":
+                continue
+            elif operator == "$inc":
+                document[field] = document.get(field, 0) + value
+            elif operator == "$push":
+                items = document.setdefault(field, [])
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                    if "$slice" in value:
+                        limit = value["$slice"]
+                        document[field] = items[limit:] if limit < 0 else items[:limit]
+                else:
+                    items.append(copy.deepcopy(value))
+            elif operator == "$addToSet":
+                items = document.setdefault(field, [])
+                values = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                for item in values:
+                    if item not in items:
+                        items.append(copy.deepcopy(item))
+            elif operator == "$pull":
+                document[field] = [item for item in document.get(field, []) if item != value]
+            else:
+                raise NotImplementedError(f"Desteklenmeyen güncelleme operatörü: {operator}")
+
+
+class InMemoryCollection:
+    """pymongo Collection arayüzünün bu projede kullanılan alt kümesi; her çağrı bir round trip sayılır."""
+
+    def __init__(self, name, client):
+        self.name = name
+        self._client = client
+        self._documents = []
+        self._ids = 0
+
+    def _round_trip(self):
+        self._client.round_trips += 1
+
+    def create_index(self, keys, **kwargs):
+        self._round_trip()
+        return kwargs.get("name", str(keys))
+
+    def find(self, query=None, projection=None):
+        self._round_trip()
+        with self._client.lock:
+            return [_project(d, projection) for d in self._documents if _matches(d, query or {})]
+
+    def find_one(self, query=None, projection=None):
+        self._round_trip()
+        with self._client.lock:
+            for document in self._documents:
+                if _matches(document, query or {}):
+                    return _project(document, projection)
+        return None
+
+    def _insert(self, document):
+        self._ids += 1
+        document = copy.deepcopy(document)
+        document.setdefault("_id", self._ids)
+        self._documents.append(document)
+        return document["_id"]
+
+    def insert_one(self, document):
+        self._round_trip()
+        with self._client.lock:
+            return SimpleNamespace(inserted_id=self._insert(document))
+
+    def insert_many(self, documents):
+        self._round_trip()
+        with self._client.lock:
+            return SimpleNamespace(inserted_ids=[self._insert(d) for d in documents])
+
+    def _update_one(self, query, update, upsert=False):
+        for document in self._documents:
+            if _matches(document, query):
+                before = copy.deepcopy(document)
+                _apply_update(document, update, inserting=False)
+                return SimpleNamespace(matched_count=1, modified_count=int(before != document), upserted_id=None)
+        if upsert:
+            document = {key: value for key, value in query.items() if not isinstance(value, dict)}
+            _apply_update(document, update, inserting=True)
+            return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=self._insert(document))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    def update_one(self, query, update, upsert=False):
+        self._round_trip()
+        with self._client.lock:
+            return self._update_one(query, update, upsert)
+
+    def bulk_write(self, operations, ordered=True):
+        self._round_trip()
+        matched = modified = upserted = 0
+        with self._client.lock:
+            for operation in operations:
+                result = self._update_one(operation._filter, operation._doc, operation._upsert)
+                matched += result.matched_count
+                modified += result.modified_count
+                upserted += int(result.upserted_id is not None)
+        return SimpleNamespace(matched_count=matched, modified_count=modified, upserted_count=upserted)
+
+
+class InMemoryDatabase:
+    def __init__(self, client):
+        self._client = client
+        self._collections = {}
+
+    def get_collection(self, name):
+        if name not in self._collections:
+            self._collections[name] = InMemoryCollection(name, self._client)
+        return self._collections[name]
+
+    __getitem__ = get_collection
+
+
+class InMemoryMongoClient:
+    """MongoClient yerine kullanılan bellek içi istemci; `round_trips` tüm veritabanı çağrılarını sayar."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.round_trips = 0
+        self._databases = {}
+
+    def __getitem__(self, name):
+        if name not in self._databases:
+            self._databases[name] = InMemoryDatabase(self)
+        return self._databases[name]
+
+    def close(self):
+        pass
+
+
+# --- Yerel NewsAPI + makale sunucusu ---
+
+ARTICLE_PARAGRAPH = (
+    "A shortage of automotive grade steel is disrupting car manufacturing across Europe. "
+    "Ford and other automakers report that suppliers cannot meet demand after a port strike "
+    "delayed shipping and logistics for several weeks, pushing tariff-adjusted prices higher. "
+)
+PAYWALL_PARAGRAPH = "Please log in or subscribe to continue reading this article."
+
+
+class StubNewsServer:
+    """
+    /v2/everything isteğine NewsAPI biçiminde yanıt veren ve makale sayfalarını sunan
+    yerel HTTP sunucusu. Her `paywall_every`'inci makale paywall metni döndürür;
+    makale sayfaları `article_latency` saniye gecikmeyle sunulur.
+    """
+
+    def __init__(self, article_count=20, paywall_every=3, article_latency=0.0):
+        self.article_count = article_count
+        self.paywall_every = paywall_every
+        self.article_latency = article_latency
+        self.bytes_served = 0
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _articles(self):
+        now = datetime.now(timezone.utc)
+        return [
+            {
+                "url": f"{self.base_url}/article/{i}",
+                "title": f"Supply chain news {i}",
+                "publishedAt": (now - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+            for i in range(self.article_count)
+        ]
+
+    def _article_html(self, index):
+        if self.paywall_every and index % self.paywall_every == self.paywall_every - 1:
+            body = f"<p>{PAYWALL_PARAGRAPH}</p>"
+        else:
+            body = "".join(f"<p>{ARTICLE_PARAGRAPH} (article {index}, paragraph {p})</p>" for p in range(6))
+        return (
+            f"<html><head><title>Supply chain news {index}</title></head>"
+            f"<body><article><h1>Supply chain news {index}</h1>{body}</article></body></html>"
+        )
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/v2/everything"):
+                    body = json.dumps({"status": "ok", "articles": server._articles()}).encode("utf-8")
+                    content_type = "application/json"
+                elif self.path.startswith("/article/"):
+                    if server.article_latency:
+                        time.sleep(server.article_latency)
+                    index = int(self.path.rsplit("/", 1)[1])
+                    body = server._article_html(index).encode("utf-8")
+                    content_type = "text/html; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                server.bytes_served += len(body)
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,52 @@
+"""
+Gmail agent'ının mesaj başına get/modify çağrılarını, batch get + batchModify ile
+yerel StubGmailService üzerinde karşılaştırır (ağ erişimi gerekmez).
+
+Kullanım (supply_agent klasöründen):
+    python benchmarks/gmail_batch.py [mesaj_sayısı] [gidiş_dönüş_gecikmesi_sn]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gmail_agent.gmail_batch import batch_get_messages, batch_mark_read
+from gmail_agent.stub_gmail import StubGmailService
+
+
+def make_service(message_count, latency):
+    service = StubGmailService(latency=latency)
+    for i in range(message_count):
+        service.add_incoming(f"thread-{i}", f"supplier{i}@example.com", "Quote", "Our unit price is 10 EUR.")
+    return service
+
+
+def per_message(service):
+    msg_ids = [m['id'] for m in service.users().messages().list(userId='me').execute()['messages']]
+    for msg_id in msg_ids:
+        service.users().messages().get(userId='me', id=msg_id).execute()
+    for msg_id in msg_ids:
+        service.users().messages().modify(userId='me', id=msg_id, body={'removeLabelIds': ['UNREAD']}).execute()
+
+
+def batched(service):
+    msg_ids = [m['id'] for m in service.users().messages().list(userId='me').execute()['messages']]
+    batch_get_messages(service, msg_ids)
+    batch_mark_read(service, msg_ids)
+
+
+def main():
+    message_count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+    for name, strategy in (("mesaj başına", per_message), ("batch", batched)):
+        service = make_service(message_count, latency)
+        start = time.perf_counter()
+        strategy(service)
+        elapsed = time.perf_counter() - start
+        print(f"{name:<14}{service.round_trips:>5} istek{elapsed:>10.2f} sn")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Uçtan uca çevrimdışı benchmark. main_orchestrator.app ve gmail_agent.main.check_and_reply
+yerel taklitlere karşı çalıştırılır: yerel NewsAPI sunucusu, gecikmesi ayarlanabilir sahte
+LLM, bellek içi MongoDB, StubGmailService ve hazır çıktı döndüren browser agent.
+
+Düğüm başına gecikme, toplam süre, N çalıştırma üzerinden throughput ve tepe bellek
+raporlanır; sonuçlar sürümler arası karşılaştırma için benchmarks/results/ altına yazılır.
+
+Kullanım (supply_agent klasöründen):
+    python benchmarks/pipeline.py --runs 5 --llm-latency 0.2 --baseline benchmarks/results/<önceki>.json
+"""
+import argparse
+import json
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import InMemoryMongoClient, StubNewsServer
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def configure_environment(args, news_server):
+    """
+    Modüller import edilmeden önce tüm dış servisleri yerel taklitlere yönlendirir.
+    Önbellekler, ölçümler ve ekran görüntüleri geçici bir klasöre yazılır; sahte
+    sonuçlar üretim önbelleklerine karışmaz. Geçici klasörün yolunu döndürür.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="benchmark_cache_")
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "LLM_FAKE_LATENCY": str(args.llm_latency),
+        "BROWSER_FAKE_LATENCY": str(args.browser_latency),
+        "TOOL_EXECUTION_MODE": "inprocess",
+        "NEWS_API_KEY": "benchmark",
+        "NEWS_API_BASE_URL": news_server.base_url,
+        "NEWS_INCREMENTAL": "0",
+        "MONGO_URI": "memory://benchmark",
+        "DB_NAME": "benchmark",
+        "SENDER_EMAIL": "benchmark@example.com",
+        "GOOGLE_API_KEY": "benchmark",
+        "RISK_TOP_N": str(args.risk_top_n),
+        "NEWS_CACHE_PATH": os.path.join(cache_dir, "articles.sqlite3"),
+        "NEWS_DEDUP_PATH": os.path.join(cache_dir, "news_dedup.sqlite3"),
+        "LLM_CACHE_PATH": os.path.join(cache_dir, "llm_responses.sqlite3"),
+        "BROWSER_CACHE_PATH": os.path.join(cache_dir, "browser_research.sqlite3"),
+        "CHECKPOINT_PATH": os.path.join(cache_dir, "checkpoints.sqlite3"),
+        "METRICS_DIR": os.path.join(cache_dir, "metrics"),
+        "AGENT_FRAMES_DIR": os.path.join(cache_dir, "frames"),
+    })
+    if not args.with_caches:
+        os.environ["NEWS_CACHE_ENABLED"] = "0"
+        os.environ["LLM_CACHE_ENABLED"] = "0"
+        os.environ["BROWSER_CACHE_ENABLED"] = "0"
+        # Kalıcı dedup indeksi açık kalırsa aynı sahte haberler sonraki ölçümlerde elenir.
+        os.environ["NEWS_DEDUP_ENABLED"] = "0"
+    return cache_dir
+
+
+def summarize(durations):
+    return {
+        "count": len(durations),
+        "mean": statistics.mean(durations),
+        "p50": statistics.median(durations),
+        "max": max(durations),
+    }
+
+
+def read_node_durations(events_path):
+    durations = defaultdict(list)
+    with open(events_path, encoding="utf-8") as f:
+        for line in f:
+            event = json.loads(line)
+            if event["type"] == "node_end":
+                durations[event["node"]].append(event["duration"])
+    return {node: summarize(values) for node, values in durations.items()}
+
+
+def run_pipeline(runs, categories=None):
+    from main_orchestrator import app
+    from tools.events import close_event_sink, set_event_sink
+
+    events_file = tempfile.NamedTemporaryFile(prefix="benchmark_events_", suffix=".jsonl", delete=False)
+    events_file.close()
+    run_durations = []
+    try:
+        for i in range(runs):
+            set_event_sink(events_file.name, f"benchmark-{i}")
+            start = time.perf_counter()
+            app.invoke({"categories": categories} if categories else {})
+            run_durations.append(time.perf_counter() - start)
+        close_event_sink()
+        nodes = read_node_durations(events_file.name)
+    finally:
+        close_event_sink()
+        os.unlink(events_file.name)
+
+    total = sum(run_durations)
+    return {
+        "runs": summarize(run_durations),
+        "total_wall_time": total,
+        "throughput_runs_per_min": runs / total * 60 if total else 0.0,
+        "nodes": nodes,
+    }
+
+
+def run_gmail_agent(message_count, gmail_latency, mongo_client):
+    from gmail_agent.stub_gmail import StubGmailService
+    import gmail_agent.main as gmail_main
+
+    service = StubGmailService(latency=gmail_latency)
+    conversations = mongo_client[os.environ["DB_NAME"]]["conversations"]
+    for i in range(message_count):
+        thread_id = f"thread-{i}"
+        conversations.insert_one({"threadId": thread_id, "messages": [
+            {"role": "model", "content": "Could you send us a quotation for 10,000 steel plates?"},
+        ]})
+        service.add_incoming(thread_id, f"supplier{i}@example.com", "Quotation", "Our unit price is 10 EUR per plate.")
+
+    gmail_main.get_gmail_service = lambda: service
+    db_round_trips_before = mongo_client.round_trips
+    start = time.perf_counter()
+    gmail_main.check_and_reply(None, SimpleNamespace(event_id="benchmark"))
+    elapsed = time.perf_counter() - start
+    return {
+        "messages": message_count,
+        "wall_time": elapsed,
+        "messages_per_sec": message_count / elapsed if elapsed else 0.0,
+        "gmail_round_trips": service.round_trips,
+        "db_round_trips": mongo_client.round_trips - db_round_trips_before,
+        "replies_sent": len(service.sent),
+    }
+
+
+def git_version():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=ROOT
+        ).stdout.strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return "unknown"
+
+
+def print_report(results, baseline=None):
+    def delta(current, previous):
+        if previous in (None, 0):
+            return ""
+        return f"  ({(current - previous) / previous:+.0%} vs baseline)"
+
+    pipeline = results["pipeline"]
+    base_pipeline = baseline["pipeline"] if baseline else {}
+    print(f"\nSürüm: {results['version']}")
+    print(f"Pipeline: {pipeline['runs']['count']} çalıştırma, toplam {pipeline['total_wall_time']:.2f} sn"
+          f"{delta(pipeline['total_wall_time'], base_pipeline.get('total_wall_time'))}")
+    print(f"Throughput: {pipeline['throughput_runs_per_min']:.1f} çalıştırma/dk")
+    print(f"{'Düğüm':<15}{'ortalama':>10}{'p50':>10}{'max':>10}")
+    for node, stats in pipeline["nodes"].items():
+        previous = base_pipeline.get("nodes", {}).get(node, {}).get("mean")
+        print(f"{node:<15}{stats['mean']:>9.3f}s{stats['p50']:>9.3f}s{stats['max']:>9.3f}s{delta(stats['mean'], previous)}")
+
+    gmail = results["gmail"]
+    base_gmail = baseline["gmail"] if baseline else {}
+    print(f"\nGmail agent: {gmail['messages']} mesaj, {gmail['wall_time']:.2f} sn"
+          f"{delta(gmail['wall_time'], base_gmail.get('wall_time'))}, "
+          f"{gmail['gmail_round_trips']} Gmail isteği, {gmail['db_round_trips']} DB isteği")
+    print(f"Tepe bellek: {results['peak_memory']['tracemalloc_mb']:.1f} MB (Python), "
+          f"{results['peak_memory']['max_rss_mb']:.1f} MB (RSS)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çevrimdışı uçtan uca benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--browser-latency", type=float, default=1.0)
+    parser.add_argument("--article-latency", type=float, default=0.1)
+    parser.add_argument("--gmail-latency", type=float, default=0.05)
+    parser.add_argument("--gmail-messages", type=int, default=20)
+    parser.add_argument("--risk-top-n", type=int, default=1)
+    parser.add_argument("--categories", help="Toplu mod için virgülle ayrılmış kategoriler")
+    parser.add_argument("--with-caches", action="store_true", help="Makale, LLM ve browser araştırma önbelleklerini ve haber dedup indeksini (geçici klasörde) açık bırakır")
+    parser.add_argument("--baseline", help="Karşılaştırılacak önceki sonuç dosyası")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    args = parser.parse_args()
+
+    news_server = StubNewsServer(article_latency=args.article_latency).start()
+    cache_dir = None
+    try:
+        cache_dir = configure_environment(args, news_server)
+        os.chdir(ROOT)
+
+        from tools.mongo_pool import set_mongo_client
+        mongo_client = InMemoryMongoClient()
+        set_mongo_client(mongo_client)
+
+        tracemalloc.start()
+        categories = [c.strip() for c in args.categories.split(",") if c.strip()] if args.categories else None
+        pipeline = run_pipeline(args.runs, categories)
+        gmail = run_gmail_agent(args.gmail_messages, args.gmail_latency, mongo_client)
+        peak_traced = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    finally:
+        news_server.stop()
+        if cache_dir:
+            shutil.rmtree(cache_dir, ignore_errors=True)
+
+    results = {
+        "version": git_version(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": vars(args),
+        "pipeline": pipeline,
+        "gmail": gmail,
+        "news_bytes_served": news_server.bytes_served,
+        "peak_memory": {
+            "tracemalloc_mb": peak_traced / 1024 / 1024,
+            # Linux'ta ru_maxrss KB cinsindendir.
+            "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        },
+    }
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(results, baseline)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    output_path = os.path.join(args.output_dir, f"{datetime.now():%Y%m%d-%H%M%S}_{results['version']}.json")
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nSonuçlar kaydedildi: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Araçların subprocess modda ödediği yorumlayıcı başlatma + import maliyetini,
+in-process moddaki tek seferlik import maliyetiyle karşılaştırır.
+
+Kullanım (supply_agent klasöründen):
+    python benchmarks/startup_time.py [tekrar_sayısı]
+"""
+import importlib
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Düğüm adı -> agent modülü
+TOOL_MODULES = {
+    "news_agent": "newsagent.newsapi",
+    "browser_agent": "browser_agent.browser",
+    "email_agent": "gmail_agent.send_initial_emails",
+}
+
+
+def measure_subprocess(module_name, repeat):
+    """Her çağrıda yeni bir yorumlayıcı başlatıp modülü import etmenin ortalama süresi."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", f"import {module_name}"],
+            capture_output=True,
+            text=True,
+        )
+        durations.append(time.perf_counter() - start)
+        if result.returncode != 0:
+            return None
+    return sum(durations) / len(durations)
+
+
+def measure_inprocess(module_name):
+    """İlk import süresi (tek seferlik) ve sonraki çağrıların import süresi."""
+    start = time.perf_counter()
+    try:
+        importlib.import_module(module_name)
+    except Exception:
+        return None, None
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    importlib.import_module(module_name)
+    warm = time.perf_counter() - start
+    return first, warm
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "pass"], check=True)
+    bare_interpreter = time.perf_counter() - start
+    print(f"Boş yorumlayıcı başlatma: {bare_interpreter * 1000:.0f} ms\n")
+
+    print(f"{'Düğüm':<15}{'subprocess/çağrı':>18}{'in-process ilk':>16}{'in-process sonraki':>20}{'çağrı başı kazanç':>20}")
+    for node_name, module_name in TOOL_MODULES.items():
+        per_call = measure_subprocess(module_name, repeat)
+        first, warm = measure_inprocess(module_name)
+        if per_call is None or first is None:
+            print(f"{node_name:<15}{'modül yüklenemedi':>18}")
+            continue
+        saving = per_call - warm
+        print(
+            f"{node_name:<15}{per_call * 1000:>15.0f} ms{first * 1000:>13.0f} ms"
+            f"{warm * 1000:>17.2f} ms{saving * 1000:>17.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
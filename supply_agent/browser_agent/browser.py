@@ -1,22 +1,38 @@
 import asyncio
 import os
 import sys
-from browser_use.llm import ChatGoogle
+
+# Betik olarak çalıştırıldığında (python browser_agent/...) tools paketi bulunabilsin.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from browser_use import Agent
 from dotenv import load_dotenv
 
+try:
+    from tools.llm_registry import get_browser_llm
+except ImportError:
+    get_browser_llm = None
+
+try:
+    from tools.agent_media import save_frames
+except ImportError:
+    save_frames = None
+
 load_dotenv()
 
-async def main():
-    if len(sys.argv) > 1:
-        task_prompt = sys.argv[1]
-    else:
-        print("Uyarı: Komut satırı argümanı bulunamadı. Varsayılan test görevi kullanılıyor.", file=sys.stderr)
-        task_prompt = "find company name and contact email for 3 alternative European suppliers of automotive grade steel"
-    print(f"🤖 Browser Agent görevi başlattı: '{task_prompt}'")
+DEFAULT_TASK_PROMPT = "find company name and contact email for 3 alternative European suppliers of automotive grade steel"
 
-    
-    llm = ChatGoogle(model='gemini-1.5-flash') 
+async def run_research(task_prompt, browser_session=None, frames_dir=None):
+    """
+    Verilen görevle browser_use Agent'ını çalıştırır ve AgentHistoryList sonucunu döndürür.
+    `browser_session` verilirse yeni bir Chromium açılmaz, hazır (warm) oturum kullanılır.
+    GIF burada üretilmez; `frames_dir` verilirse ekran görüntüleri kare olarak kaydedilir.
+    """
+    if get_browser_llm:
+        llm = get_browser_llm('gemini-1.5-flash').limited_async()
+    else:
+        from browser_use.llm import ChatGoogle
+        llm = ChatGoogle(model='gemini-1.5-flash')
     
     extend_system_message = """
     - ALWAYS open first a new tab.
@@ -35,9 +51,24 @@ async def main():
         llm=llm,
         extend_system_message=extend_system_message,
         max_steps=12,
-        generate_gif=True
+        generate_gif=False,
+        browser_session=browser_session,
     )
-    result = await agent.run()
+    history = await agent.run()
+    if frames_dir and save_frames:
+        save_frames(history.screenshots(), frames_dir)
+    return history
+
+async def main():
+    if len(sys.argv) > 1:
+        task_prompt = sys.argv[1]
+    else:
+        print("Uyarı: Komut satırı argümanı bulunamadı. Varsayılan test görevi kullanılıyor.", file=sys.stderr)
+        task_prompt = DEFAULT_TASK_PROMPT
+    frames_dir = sys.argv[2] if len(sys.argv) > 2 else None
+    print(f"🤖 Browser Agent görevi başlattı: '{task_prompt}'")
+
+    result = await run_research(task_prompt, frames_dir=frames_dir)
     print(result)
 
 
@@ -0,0 +1,163 @@
+"""
+Kalıcı browser worker servisi. Hazır (warm) browser_use oturumlarından oluşan bir havuz
+tutar ve araştırma görevlerini yerel bir soket üzerinden (multiprocessing.connection)
+kabul eder; böylece her görevde yeni yorumlayıcı ve yeni Chromium başlatılmaz.
+Bellek kullanımını sınırlamak için her oturum BROWSER_POOL_RECYCLE_AFTER görevden
+sonra kapatılıp yerine yenisi açılır.
+
+Kullanım (supply_agent klasöründen):
+    python browser_agent/pool.py
+Orkestratör tarafında BROWSER_POOL_ADDRESS=127.0.0.1:6010 ayarlanınca görevler havuza gönderilir.
+Her iki tarafta da aynı, gizli bir BROWSER_POOL_AUTHKEY tanımlanmalıdır; tanımlı değilse
+servis başlamaz ve orkestratör havuzu kullanmaz.
+"""
+import asyncio
+import os
+import sys
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Listener
+
+# Betik olarak çalıştırıldığında (python browser_agent/...) tools paketi bulunabilsin.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from browser_use import BrowserSession
+from dotenv import load_dotenv
+
+try:
+    from browser_agent.browser import run_research
+except ImportError:
+    from browser import run_research
+
+load_dotenv()
+
+BROWSER_POOL_ADDRESS = os.getenv("BROWSER_POOL_ADDRESS", "127.0.0.1:6010")
+# Bağlantılar pickle ile çözüldüğünden anahtar zorunludur ve tahmin edilemez olmalıdır.
+BROWSER_POOL_AUTHKEY = os.getenv("BROWSER_POOL_AUTHKEY")
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_POOL_RECYCLE_AFTER = int(os.getenv("BROWSER_POOL_RECYCLE_AFTER", "10"))
+
+
+def parse_address(address):
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+class WarmSession:
+    """Havuzdaki bir tarayıcı oturumu ve bu oturumda çalıştırılan görev sayısı."""
+
+    def __init__(self, index):
+        self.index = index
+        self.session = None
+        self.tasks = 0
+
+    async def start(self):
+        session = BrowserSession(keep_alive=True)
+        await session.start()
+        self.session = session
+        self.tasks = 0
+
+    async def recycle(self):
+        """
+        Oturumu kapatıp yenisini açar. Yeni oturum başlatılamazsa `session` None kalır ve
+        bir sonraki görevde yeniden denenir; böylece havuzdaki yer kaybolmaz.
+        """
+        print(f"Oturum {self.index}: {self.tasks} görev tamamlandı, yeniden başlatılıyor.", file=sys.stderr)
+        session, self.session = self.session, None
+        try:
+            await session.kill()
+        except Exception as e:
+            print(f"UYARI: Oturum {self.index} kapatılamadı: {e}", file=sys.stderr)
+        try:
+            await self.start()
+        except Exception as e:
+            print(f"HATA: Oturum {self.index} yeniden başlatılamadı, sonraki görevde denenecek: {e}", file=sys.stderr)
+
+
+class BrowserPool:
+    """Sabit sayıda hazır oturumu bir asyncio kuyruğunda tutar; her görev boştaki bir oturumu ödünç alır."""
+
+    def __init__(self, size=BROWSER_POOL_SIZE, recycle_after=BROWSER_POOL_RECYCLE_AFTER):
+        self.size = size
+        self.recycle_after = recycle_after
+        self.idle = None
+
+    async def start(self):
+        self.idle = asyncio.Queue()
+        for index in range(self.size):
+            warm = WarmSession(index)
+            await warm.start()
+            self.idle.put_nowait(warm)
+        print(f"Browser havuzu hazır: {self.size} oturum.", file=sys.stderr)
+
+    async def run(self, task_prompt, frames_dir=None):
+        warm = await self.idle.get()
+        try:
+            if warm.session is None:
+                await warm.start()
+            history = await run_research(task_prompt, browser_session=warm.session, frames_dir=frames_dir)
+            return {
+                "output": str(history),
+                "final_result": history.final_result(),
+                "is_successful": history.is_successful(),
+            }
+        finally:
+            try:
+                warm.tasks += 1
+                if warm.session is not None and warm.tasks >= self.recycle_after:
+                    await warm.recycle()
+            finally:
+                self.idle.put_nowait(warm)
+
+    async def close(self):
+        while not self.idle.empty():
+            warm = self.idle.get_nowait()
+            if warm.session is not None:
+                await warm.session.kill()
+
+
+def handle_connection(conn, pool, loop):
+    """Tek bir istemci bağlantısı: {"task": ...} isteğini havuzda çalıştırıp sonucu geri gönderir."""
+    try:
+        request = conn.recv()
+        print(f"🤖 Görev alındı: '{request['task']}'", file=sys.stderr)
+        try:
+            result = asyncio.run_coroutine_threadsafe(pool.run(request["task"], request.get("frames_dir")), loop).result()
+            conn.send({"ok": True, "result": result})
+        except Exception as e:
+            print(f"HATA: Görev başarısız oldu: {e}", file=sys.stderr)
+            conn.send({"ok": False, "error": str(e)})
+    except (EOFError, OSError):
+        pass
+    finally:
+        conn.close()
+
+
+def serve(address=BROWSER_POOL_ADDRESS, authkey=BROWSER_POOL_AUTHKEY):
+    if not authkey:
+        raise SystemExit("HATA: BROWSER_POOL_AUTHKEY tanımlı değil; browser worker servisi başlatılmadı.")
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    pool = BrowserPool()
+    asyncio.run_coroutine_threadsafe(pool.start(), loop).result()
+
+    listener = Listener(parse_address(address), authkey=authkey.encode("utf-8"))
+    print(f"Browser worker servisi dinliyor: {address}", file=sys.stderr)
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except AuthenticationError:
+                print("UYARI: Yetkisiz bağlantı reddedildi.", file=sys.stderr)
+                continue
+            threading.Thread(target=handle_connection, args=(conn, pool, loop), daemon=True).start()
+    except KeyboardInterrupt:
+        print("Browser worker servisi durduruluyor...", file=sys.stderr)
+    finally:
+        listener.close()
+        asyncio.run_coroutine_threadsafe(pool.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,45 @@
+"""
+Gmail API çağrılarını toplu (batch) yapan yardımcılar.
+Mesaj başına ayrı HTTP isteği yerine tek bir batch isteği / batchModify kullanılır.
+"""
+
+# Gmail batch isteği başına önerilen en fazla alt istek sayısı.
+GMAIL_BATCH_SIZE = 50
+# batchModify'ın tek istekte kabul ettiği en fazla mesaj kimliği.
+GMAIL_BATCH_MODIFY_LIMIT = 1000
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def batch_get_messages(service, msg_ids, batch_size=GMAIL_BATCH_SIZE):
+    """
+    Mesajları Gmail batch isteğiyle çeker ve {msg_id: mesaj} sözlüğü döndürür.
+    Alınamayan mesajlar loglanır ve sözlüğe eklenmez.
+    """
+    messages = {}
+
+    def callback(request_id, response, exception):
+        if exception is not None:
+            print(f"HATA: Mesaj {request_id} alınamadı: {exception}")
+            return
+        messages[request_id] = response
+
+    for chunk in _chunks(list(msg_ids), batch_size):
+        batch = service.new_batch_http_request(callback=callback)
+        for msg_id in chunk:
+            batch.add(service.users().messages().get(userId='me', id=msg_id), request_id=msg_id)
+        batch.execute()
+    return messages
+
+
+def batch_mark_read(service, msg_ids):
+    """Verilen mesajlardan UNREAD etiketini tek bir batchModify çağrısıyla kaldırır."""
+    msg_ids = list(msg_ids)
+    for chunk in _chunks(msg_ids, GMAIL_BATCH_MODIFY_LIMIT):
+        service.users().messages().batchModify(
+            userId='me', body={'ids': chunk, 'removeLabelIds': ['UNREAD']}
+        ).execute()
+    return len(msg_ids)
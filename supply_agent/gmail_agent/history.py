@@ -0,0 +1,66 @@
+"""
+Konuşma geçmişini sınırlı tutmak için yardımcılar.
+Sıcak dokümanda yalnızca son turlar kalır; daha eski turlar kademeli olarak
+güncellenen bir özete (rolling summary) katlanır.
+"""
+import os
+
+# Sıcak dokümanda tutulacak en fazla tur ve yaklaşık token bütçesi.
+HISTORY_MAX_TURNS = int(os.environ.get('GMAIL_HISTORY_MAX_TURNS', '10'))
+HISTORY_MAX_TOKENS = int(os.environ.get('GMAIL_HISTORY_MAX_TOKENS', '4000'))
+# Özet dışında her zaman korunacak en az son tur sayısı.
+HISTORY_MIN_TURNS = 2
+
+SUMMARY_PROMPT = """
+You maintain a running summary of a supplier negotiation conducted by email on behalf of Ford Otosan.
+Update the existing summary with the new messages below. Keep every concrete fact: products, quantities,
+prices, currencies, discounts, delivery terms, deadlines and open questions. Be concise and factual.
+Return only the updated summary.
+
+Existing summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+
+def estimate_tokens(text):
+    """Kaba token tahmini (~4 karakter/token)."""
+    return len(text) // 4 + 1
+
+
+def split_for_compaction(messages, max_turns=HISTORY_MAX_TURNS, max_tokens=HISTORY_MAX_TOKENS):
+    """
+    Mesajları (özetlenecek eski turlar, sıcak dokümanda kalacak son turlar) olarak ayırır.
+    Son turlar hem tur hem token bütçesine sığacak şekilde seçilir; bütçe aşılmıyorsa eski tur listesi boştur.
+    """
+    kept = []
+    tokens = 0
+    for message in reversed(messages):
+        message_tokens = estimate_tokens(message.get('content', ''))
+        over_budget = len(kept) >= max_turns or tokens + message_tokens > max_tokens
+        if over_budget and len(kept) >= HISTORY_MIN_TURNS:
+            break
+        kept.append(message)
+        tokens += message_tokens
+    kept.reverse()
+    return messages[:len(messages) - len(kept)], kept
+
+
+def build_summary_prompt(summary, older_messages):
+    lines = [f"{message.get('role', 'user')}: {message.get('content', '')}" for message in older_messages]
+    return SUMMARY_PROMPT.format(summary=summary or "(none)", messages="\n".join(lines))
+
+
+def build_history(conversation):
+    """Özet (varsa) ve son turlardan Gemini start_chat geçmişini oluşturur."""
+    history = []
+    if conversation.get('summary'):
+        history.append({'role': 'user', 'parts': [f"Summary of the earlier conversation:\n{conversation['summary']}"]})
+        history.append({'role': 'model', 'parts': ["Understood."]})
+    history.extend(
+        {'role': 'model' if msg.get('role') == 'model' else 'user', 'parts': [msg.get('content', '')]}
+        for msg in conversation.get('messages', []) if msg.get('content')
+    )
+    return history
@@ -1,14 +1,35 @@
 import os
 import base64
+import contextlib
+import contextvars
 import json
 import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from email.mime.text import MIMEText
 
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 import google.generativeai as genai
-from pymongo import MongoClient
+from pymongo import MongoClient, UpdateOne
+
+try:
+    from tools.llm_registry import get_generative_model
+    from tools.mongo_pool import get_mongo_client
+    from tools import metrics
+except ImportError:
+    # Cloud Function olarak tek başına deploy edildiğinde tools paketi bulunmaz.
+    get_generative_model = None
+    get_mongo_client = None
+    metrics = None
+
+try:
+    from gmail_agent.gmail_batch import batch_get_messages, batch_mark_read
+    from gmail_agent.history import build_history, build_summary_prompt, split_for_compaction
+except ImportError:
+    from gmail_batch import batch_get_messages, batch_mark_read
+    from history import build_history, build_summary_prompt, split_for_compaction
 
 system_prompt = """
 You are a professional supply chain assistant writing on behalf of Ford Otosan.
@@ -22,8 +43,21 @@ YOUR RULES:
 5.  Discount: If the message concerns pricing, proactively offer a discount for bulk purchase quantities, in a polite and professional manner.
 """
 
+# Yanıt üretmek için konuşma dokümanından okunan alanlar.
+CONVERSATION_PROJECTION = {"_id": 0, "threadId": 1, "messages": 1, "summary": 1, "archived_count": 1}
+
+# Aynı anda işlenecek en fazla konuşma (thread) sayısı; 1 ise sıralı çalışır.
+GMAIL_REPLY_WORKERS = int(os.environ.get('GMAIL_REPLY_WORKERS', '4'))
+# Konuşma dokümanında tutulan en fazla yanıtlanmış mesaj kimliği. Okundu işaretlenen
+# mesajlar "is:unread" sorgusuna tekrar düşmediğinden yalnızca son kimlikler gerekir.
+GMAIL_CLAIMED_IDS_KEEP = int(os.environ.get('GMAIL_CLAIMED_IDS_KEEP', '100'))
+
 client = None
 generative_model = None
+summary_model = None
+# Model eşzamanlılık sınırı; registry yoksa sınırsız.
+model_slot = contextlib.nullcontext()
+summary_slot = contextlib.nullcontext()
 SENDER_EMAIL = None
 
 try:
@@ -35,11 +69,30 @@ try:
     if not all([MONGO_URI, DB_NAME, SENDER_EMAIL, api_key]):
         raise ValueError("Ortam değişkenlerinden biri eksik. MONGO_URI, DB_NAME, SENDER_EMAIL, GOOGLE_API_KEY kontrol edin.")
 
-    client = MongoClient(MONGO_URI)
+    client = get_mongo_client(MONGO_URI) if get_mongo_client else MongoClient(MONGO_URI)
     db = client[DB_NAME]
     conversations_collection = db.get_collection("conversations")
-    genai.configure(api_key=api_key)
-    generative_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=system_prompt)
+    # threadId sorguları için index; süreç (Cloud Function instance) başına bir kez oluşturulur.
+    conversations_collection.create_index("threadId", name="threadId")
+    # Özetlenen eski turların ham hali sıcak dokümandan bu koleksiyona taşınır.
+    archive_collection = db.get_collection("conversation_archive")
+    archive_collection.create_index("threadId", name="threadId")
+    # Her tur, konuşmadaki mutlak sırasıyla (index) bir kez arşivlenir; tekrar denemeler kopya üretmez.
+    archive_collection.create_index(
+        [("threadId", 1), ("index", 1)], name="threadId_index", unique=True,
+        partialFilterExpression={"index": {"$exists": True}},
+    )
+    if get_generative_model:
+        model_client = get_generative_model('gemini-1.5-flash-latest', system_instruction=system_prompt)
+        generative_model = model_client.client
+        model_slot = model_client.limit()
+        summary_client = get_generative_model('gemini-1.5-flash-latest')
+        summary_model = summary_client.client
+        summary_slot = summary_client.limit()
+    else:
+        genai.configure(api_key=api_key)
+        generative_model = genai.GenerativeModel('gemini-1.5-flash-latest', system_instruction=system_prompt)
+        summary_model = genai.GenerativeModel('gemini-1.5-flash-latest')
     print("Servisler başarıyla başlatıldı.")
 except Exception as e:
     print(f"HATA: Genel başlatma sırasında bir sorun oluştu: {e}")
@@ -57,6 +110,14 @@ def get_gmail_service():
             raise Exception("Gmail token'ı geçersiz veya bulunamadı. Lütfen token.pickle dosyasını kodla birlikte deploy edin.")
     return build('gmail', 'v1', credentials=creds)
 
+_worker_local = threading.local()
+
+def get_worker_gmail_service():
+    """googleapiclient servisleri thread-safe değildir; her iş parçacığı kendi servisini kullanır."""
+    if not hasattr(_worker_local, 'service'):
+        _worker_local.service = get_gmail_service()
+    return _worker_local.service
+
 def get_email_body(payload):
     if "parts" in payload:
         for part in payload['parts']:
@@ -91,6 +152,160 @@ def send_reply(service, to, subject, body, thread_id):
     raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
     return service.users().messages().send(userId='me', body={'raw': raw_message, 'threadId': thread_id}).execute()
 
+def claim_message(thread_id, msg_id):
+    """
+    Mesajı yanıtlanmak üzere atomik olarak işaretler. Mesaj daha önce (örn. tekrar
+    denenen bir çağrıda) işaretlendiyse False döner; böylece aynı yanıt iki kez gönderilmez.
+    Sıcak dokümanın büyümemesi için yalnızca son GMAIL_CLAIMED_IDS_KEEP kimlik tutulur.
+    """
+    result = conversations_collection.update_one(
+        {"threadId": thread_id, "replied_message_ids": {"$ne": msg_id}},
+        {"$push": {"replied_message_ids": {"$each": [msg_id], "$slice": -GMAIL_CLAIMED_IDS_KEEP}}}
+    )
+    return result.modified_count == 1
+
+def release_message(thread_id, msg_id):
+    conversations_collection.update_one({"threadId": thread_id}, {"$pull": {"replied_message_ids": msg_id}})
+
+def reply_to_message(gmail_service, msg_id, thread_id, conversation, full_message):
+    """
+    Tek bir tedarikçi mesajına Gemini ile yanıt üretip gönderir.
+    Mesaj okundu olarak işaretlenebilirse (yanıt gönderildi veya zaten gönderilmişti) True döner.
+    """
+    user_reply_text = get_email_body(full_message['payload']).strip()
+
+    if not user_reply_text:
+        print(f"Mesaj {msg_id} için metin gövdesi bulunamadı, atlanıyor.")
+        return False
+
+    if not claim_message(thread_id, msg_id):
+        print(f"Mesaj {msg_id} daha önce yanıtlanmış, tekrar gönderilmiyor.")
+        return True
+
+    # İşaret yalnızca e-posta gönderilmeden önceki hatalarda kaldırılır; gönderimden sonra
+    # kaldırılırsa mesaj okunmamış kalır ve sonraki çağrıda ikinci bir yanıt gönderilir.
+    try:
+        ai_reply_text = generate_and_send_reply(gmail_service, thread_id, conversation, full_message, user_reply_text)
+    except Exception:
+        release_message(thread_id, msg_id)
+        raise
+
+    try:
+        conversations_collection.update_one(
+            {"threadId": thread_id},
+            {"$push": {"messages": {"role": "model", "content": ai_reply_text}}}
+        )
+    except Exception as e:
+        print(f"UYARI: Thread {thread_id} için gönderilen yanıt veritabanına eklenemedi: {e}")
+        return True
+
+    # Aynı thread'deki sonraki mesajlar bu yanıtı geçmişte görsün.
+    conversation.setdefault('messages', []).append({"role": "model", "content": ai_reply_text})
+    try:
+        compact_conversation(thread_id, conversation)
+    except Exception as e:
+        print(f"UYARI: Thread {thread_id} geçmişi özetlenemedi, sonraki yanıtta tekrar denenecek: {e}")
+    return True
+
+def compact_conversation(thread_id, conversation):
+    """
+    Geçmiş tur/token bütçesini aşarsa eski turları mevcut özete katlar, ham hallerini
+    conversation_archive koleksiyonuna kopyalar ve ancak bundan sonra sıcak dokümandan
+    yalnızca özetlenen turları siler. Arşiv yazımı (threadId, mutlak tur sırası) anahtarıyla
+    idempotenttir; arşivleme başarısız olursa doküman değişmez ve sonraki yanıtta tekrar
+    denenir. Silme, dizinin başındaki len(older) elemana uygulanır; bu arada başka bir
+    çağrının eklediği yanıtlar korunur. Doküman anlık görüntüden sonra başka bir çağrıda
+    sıkıştırılmışsa (özet veya arşiv sayısı değişmişse) güncelleme uygulanmaz.
+    """
+    older, recent = split_for_compaction(conversation.get('messages', []))
+    if not older:
+        return
+
+    summary_prompt = build_summary_prompt(conversation.get('summary'), older)
+    with summary_slot:
+        response = summary_model.generate_content(summary_prompt)
+    if metrics:
+        metrics.record_llm_usage(response, summary_prompt)
+    summary = response.text.strip()
+
+    archived_count = conversation.get('archived_count') or 0
+    archived_at = datetime.utcnow()
+    archive_collection.bulk_write([
+        UpdateOne(
+            {"threadId": thread_id, "index": archived_count + offset},
+            {"$setOnInsert": {"role": msg.get('role'), "content": msg.get('content'), "archived_at": archived_at}},
+            upsert=True,
+        )
+        for offset, msg in enumerate(older)
+    ])
+
+    result = conversations_collection.update_one(
+        {
+            "threadId": thread_id,
+            "summary": conversation.get('summary'),
+            "archived_count": conversation.get('archived_count'),
+            f"messages.{len(older) - 1}.content": older[-1].get('content'),
+        },
+        [{"$set": {
+            "summary": summary,
+            "archived_count": {"$add": [{"$ifNull": ["$archived_count", 0]}, len(older)]},
+            "messages": {"$slice": ["$messages", len(older), {"$max": [1, {"$size": "$messages"}]}]},
+        }}]
+    )
+    if result.modified_count != 1:
+        print(f"Thread {thread_id}: geçmiş başka bir çağrıda değişmiş, özetleme atlanıyor.")
+        return
+
+    conversation['summary'] = summary
+    conversation['archived_count'] = archived_count + len(older)
+    conversation['messages'] = recent
+    print(f"Thread {thread_id}: {len(older)} eski tur özetlendi ve arşive taşındı.")
+
+def generate_and_send_reply(gmail_service, thread_id, conversation, full_message, user_reply_text):
+    """
+    Konuşma geçmişiyle Gemini'den yanıt alır ve e-postayı gönderir. Yanıtın veritabanına
+    eklenmesi çağırana bırakılır; böylece bu fonksiyondaki her hata gönderimden önce olur.
+    """
+    history_for_gemini = build_history(conversation)
+
+    with model_slot:
+        chat_session = generative_model.start_chat(history=history_for_gemini)
+        response = chat_session.send_message(user_reply_text)
+    if metrics:
+        metrics.record_llm_usage(response, user_reply_text)
+    ai_reply_text = response.text
+
+
+    subject = get_subject_from_headers(full_message['payload']['headers'])
+    to_email = extract_sender(full_message['payload']['headers'])
+    send_reply(
+        service=gmail_service,
+        to=to_email,
+        subject="Re: " + subject,
+        body=ai_reply_text,
+        thread_id=thread_id
+    )
+    return ai_reply_text
+
+def process_thread(gmail_service, thread_items):
+    """
+    Aynı threadId'ye ait mesajları sırayla yanıtlar ve okundu işaretlenecek mesaj
+    kimliklerini döndürür. Bir mesajda hata olursa sıranın bozulmaması için thread'in
+    kalan mesajları bu çalıştırmada işlenmez.
+    """
+    replied_ids = []
+    for msg_id, thread_id, conversation, full_message in thread_items:
+        try:
+            if reply_to_message(gmail_service, msg_id, thread_id, conversation, full_message):
+                replied_ids.append(msg_id)
+        except Exception as e:
+            print(f"HATA: Thread {thread_id} mesaj {msg_id} işlenirken bir sorun oluştu: {e}")
+            break
+    return replied_ids
+
+def process_thread_in_worker(thread_items):
+    return process_thread(get_worker_gmail_service(), thread_items)
+
 # --- ANA CLOUD FUNCTION (PUB/SUB İÇİN) ---
 def check_and_reply(event, context):
     if not client or not generative_model:
@@ -98,6 +313,20 @@ def check_and_reply(event, context):
         return
 
     print(f"Pub/Sub tarafından tetiklendi. Event ID: {context.event_id}")
+    if metrics:
+        run_id = f"gmail-{context.event_id}"
+        metrics.start_run(run_id)
+        try:
+            metrics.instrument_node("gmail_agent", process_inbox)()
+        finally:
+            metrics.export_run(run_id=run_id, component="gmail_agent")
+            metrics.discard_run(run_id)
+    else:
+        process_inbox()
+    print("Kontrol tamamlandı.")
+
+def process_inbox():
+    """Okunmamış tedarikçi yanıtlarını bulur, yanıtlar ve okundu olarak işaretler."""
     try:
         gmail_service = get_gmail_service()
         results = gmail_service.users().messages().list(userId='me', q="is:unread from:(-me)").execute()
@@ -108,53 +337,57 @@ def check_and_reply(event, context):
             return
         
         print(f"{len(messages)} okunmamış mesaj bulundu. İşleniyor...")
+        # Tüm thread'lerin konuşmaları tek bir $in sorgusuyla çekilir; takip edilmeyen
+        # thread'ler Gmail'den mesaj gövdesi istenmeden elenir.
+        thread_ids = list({msg_summary['threadId'] for msg_summary in messages})
+        conversations = {
+            conversation['threadId']: conversation
+            for conversation in conversations_collection.find({"threadId": {"$in": thread_ids}}, CONVERSATION_PROJECTION)
+        }
+
+        tracked = []
         for msg_summary in messages:
-            msg_id = msg_summary['id']
             thread_id = msg_summary['threadId']
-            conversation = conversations_collection.find_one({"threadId": thread_id})
+            conversation = conversations.get(thread_id)
 
             if not conversation:
                 print(f"Thread {thread_id} veritabanında bulunamadı, atlanıyor.")
                 continue
-            
-            full_message = gmail_service.users().messages().get(userId='me', id=msg_id).execute()
-            user_reply_text = get_email_body(full_message['payload']).strip()
-
-            if not user_reply_text:
-                print(f"Mesaj {msg_id} için metin gövdesi bulunamadı, atlanıyor.")
-                continue
-
-            history_for_gemini = [
-                {'role': 'model' if msg.get('role') == 'model' else 'user', 'parts': [msg.get('content', '')]}
-                for msg in conversation.get('messages', []) if msg.get('content')
-            ]
-
-            chat_session = generative_model.start_chat(history=history_for_gemini)
-            response = chat_session.send_message(user_reply_text)
-            ai_reply_text = response.text
+            tracked.append((msg_summary['id'], thread_id, conversation))
 
+        if not tracked:
+            return
 
-            subject = get_subject_from_headers(full_message['payload']['headers'])
-            to_email = extract_sender(full_message['payload']['headers'])
-            send_reply(
-                service=gmail_service,
-                to=to_email,
-                subject="Re: " + subject,
-                body=ai_reply_text,
-                thread_id=thread_id
-            )
+        # Takip edilen tüm mesajlar tek bir batch isteğiyle çekilir.
+        full_messages = batch_get_messages(gmail_service, [msg_id for msg_id, _, _ in tracked])
 
-            
-            conversations_collection.update_one(
-                {"threadId": thread_id},
-                {"$push": {"messages": {"role": "model", "content": ai_reply_text}}}
-            )
+        # Mesajlar thread'e göre gruplanır; thread içi sıra korunur, farklı thread'ler paralel işlenir.
+        threads = {}
+        for msg_id, thread_id, conversation in tracked:
+            full_message = full_messages.get(msg_id)
+            if full_message:
+                threads.setdefault(thread_id, []).append((msg_id, thread_id, conversation, full_message))
+        for thread_items in threads.values():
+            thread_items.sort(key=lambda item: int(item[3].get('internalDate', 0)))
 
-            
-            gmail_service.users().messages().modify(userId='me', id=msg_id, body={'removeLabelIds': ['UNREAD']}).execute()
+        replied_ids = []
+        try:
+            if GMAIL_REPLY_WORKERS <= 1 or len(threads) <= 1:
+                for thread_items in threads.values():
+                    replied_ids.extend(process_thread(gmail_service, thread_items))
+            else:
+                with ThreadPoolExecutor(max_workers=GMAIL_REPLY_WORKERS) as executor:
+                    # Ölçümlerin gmail_agent adına yazılması için context her iş parçacığına kopyalanır.
+                    futures = [
+                        executor.submit(contextvars.copy_context().run, process_thread_in_worker, thread_items)
+                        for thread_items in threads.values()
+                    ]
+                    for future in futures:
+                        replied_ids.extend(future.result())
+        finally:
+            # Yanıtlanan mesajların UNREAD etiketi tek bir batchModify çağrısıyla kaldırılır.
+            if replied_ids:
+                batch_mark_read(gmail_service, replied_ids)
 
     except Exception as e:
         print(f"HATA: Ana işlem sırasında bir sorun oluştu: {e}")
-            
-    print("Kontrol tamamlandı.")
-    return
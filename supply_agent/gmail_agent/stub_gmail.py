@@ -0,0 +1,134 @@
+"""
+Gmail API'sinin ağ erişimi olmadan çalışan yerel taklidi.
+googleapiclient'ın `service.users().messages()...execute()` ve batch arayüzlerini
+taklit eder; her HTTP gidiş-dönüşünü `round_trips` ile sayar ve isteğe bağlı
+`latency` kadar bekler. Batching'i çevrimdışı test etmek ve ölçmek için kullanılır.
+"""
+import base64
+import itertools
+import threading
+import time
+
+
+class StubRequest:
+    def __init__(self, service, handler):
+        self._service = service
+        self._handler = handler
+
+    def execute(self):
+        self._service._round_trip()
+        return self._handler()
+
+
+class StubBatchRequest:
+    def __init__(self, service, callback=None):
+        self._service = service
+        self._callback = callback
+        self._requests = []
+
+    def add(self, request, callback=None, request_id=None):
+        request_id = request_id or str(len(self._requests))
+        self._requests.append((request_id, request, callback or self._callback))
+
+    def execute(self):
+        # Tüm alt istekler tek bir HTTP gidiş-dönüşünde yapılır.
+        self._service._round_trip()
+        for request_id, request, callback in self._requests:
+            try:
+                response, exception = request._handler(), None
+            except Exception as e:
+                response, exception = None, e
+            if callback:
+                callback(request_id, response, exception)
+
+
+class StubMessages:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, userId, q=None, **kwargs):
+        def handler():
+            unread = [
+                {'id': m['id'], 'threadId': m['threadId']}
+                for m in self._service.messages.values() if 'UNREAD' in m['labelIds']
+            ]
+            return {'messages': unread} if unread else {}
+        return StubRequest(self._service, handler)
+
+    def get(self, userId, id, **kwargs):
+        def handler():
+            if id not in self._service.messages:
+                raise KeyError(f"Mesaj bulunamadı: {id}")
+            return self._service.messages[id]
+        return StubRequest(self._service, handler)
+
+    def send(self, userId, body):
+        def handler():
+            self._service.sent.append(body)
+            return {'id': f"sent-{len(self._service.sent)}", 'threadId': body.get('threadId')}
+        return StubRequest(self._service, handler)
+
+    def modify(self, userId, id, body):
+        def handler():
+            self._service._remove_labels([id], body.get('removeLabelIds', []))
+            return self._service.messages.get(id)
+        return StubRequest(self._service, handler)
+
+    def batchModify(self, userId, body):
+        def handler():
+            self._service._remove_labels(body.get('ids', []), body.get('removeLabelIds', []))
+            return {}
+        return StubRequest(self._service, handler)
+
+
+class StubUsers:
+    def __init__(self, service):
+        self._service = service
+
+    def messages(self):
+        return StubMessages(self._service)
+
+
+class StubGmailService:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.messages = {}
+        self.sent = []
+        self.round_trips = 0
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def _round_trip(self):
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _remove_labels(self, msg_ids, labels):
+        with self._lock:
+            for msg_id in msg_ids:
+                message = self.messages.get(msg_id)
+                if message:
+                    message['labelIds'] = [label for label in message['labelIds'] if label not in labels]
+
+    def add_incoming(self, thread_id, sender, subject, body):
+        """Gelen kutusuna okunmamış bir mesaj ekler ve kimliğini döndürür."""
+        msg_id = f"msg-{next(self._ids)}"
+        data = base64.urlsafe_b64encode(body.encode('utf-8')).decode('utf-8')
+        self.messages[msg_id] = {
+            'id': msg_id,
+            'threadId': thread_id,
+            'labelIds': ['UNREAD', 'INBOX'],
+            'payload': {
+                'mimeType': 'text/plain',
+                'headers': [{'name': 'From', 'value': sender}, {'name': 'Subject', 'value': subject}],
+                'body': {'data': data},
+            },
+        }
+        return msg_id
+
+    def users(self):
+        return StubUsers(self)
+
+    def new_batch_http_request(self, callback=None):
+        return StubBatchRequest(self, callback)
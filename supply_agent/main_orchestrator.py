@@ -1,23 +1,70 @@
+import argparse
+import contextvars
 import json
+import operator
 import os
-from typing import TypedDict
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langgraph.types import Send
 from dotenv import load_dotenv
-from pymongo import MongoClient
+from pymongo import UpdateOne
 
 
 load_dotenv() 
 
+# Risk analistinin üreteceği risk (ve paralel browser araştırması) sayısı.
+RISK_TOP_N = int(os.getenv("RISK_TOP_N", "1"))
+# Aynı anda çalışabilecek en fazla browser araştırması.
+BROWSER_MAX_CONCURRENCY = int(os.getenv("BROWSER_MAX_CONCURRENCY", "2"))
+browser_slots = threading.BoundedSemaphore(BROWSER_MAX_CONCURRENCY)
+# Scheduler modunda üst üste binen çalıştırmalarda bir düğümün aynı anda en fazla kaç
+# örneğinin çalışabileceği. news_agent filigran dosyasını, email_agent 'pending' tedarikçileri
+# paylaştığından varsayılan olarak tek örnekle sınırlıdır.
+NODE_CONCURRENCY_LIMITS = json.loads(
+    os.getenv("NODE_CONCURRENCY_LIMITS", '{"news_agent": 1, "save_to_db": 1, "email_agent": 1}')
+)
+node_slots = {name: threading.BoundedSemaphore(int(limit)) for name, limit in NODE_CONCURRENCY_LIMITS.items()}
+# Browser dalları da aynı yoldan sınırlanır; böylece sıra bekleme süresi düğüm süresine sayılmaz.
+node_slots["browser_agent"] = browser_slots
+# Her düğümden sonra WorkflowState'in kaydedildiği yerel checkpoint veritabanı.
+CHECKPOINT_PATH = os.getenv(
+    "CHECKPOINT_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "checkpoints.sqlite3"),
+)
+# Artımlı haber modunda yeni haber yoksa akış hata vermeden sonlanır.
+NEWS_INCREMENTAL = os.getenv("NEWS_INCREMENTAL", "0") == "1"
+
 from tools.news_tool import run_news_agent
-from tools.browser_tool import run_browser_agent
+from tools.browser_tool import BROWSER_CACHE_REFRESH, run_browser_research
 from tools.gmail_tool import run_email_agent
+from tools.llm_cache import cached_completion
+from tools.llm_registry import get_chat_model
+from tools.events import close_event_sink, emit_event, set_event_sink, traced_node
+from tools.events import current_run as event_run
+from tools.metrics import discard_run, export_run, instrument_node, record, start_run
+from tools.mongo_pool import MAILING_LIST_COLLECTION, get_database, normalize_email
+from tools.research_cache import extract_material
+from tools.supplier_extractor import SOURCE_LLM, SOURCE_RULES, extract_with_rules, is_valid_email
 
 
 class WorkflowState(TypedDict):
     news_articles: str
+    # Toplu (batch) modda incelenecek malzeme kategorileri / risk temaları.
+    categories: list
+    search_prompts: list
+    # search_prompts ile aynı sırada, her sorgunun ait olduğu kategori (tekli modda None).
+    search_categories: list
     search_prompt: str
-    browser_output: str
+    category: str
+    # True ise browser araştırma önbelleği atlanır ve araştırmalar yeniden yapılır.
+    refresh_research: bool
+    # Paralel browser dallarının {"category", "search_prompt", "output", "final_result"} çıktıları bu listede birleştirilir.
+    browser_outputs: Annotated[list, operator.add]
     suppliers_json: str
     db_status: str
     final_status: str
@@ -28,20 +75,46 @@ def news_node(state: WorkflowState):
     """Haberleri çeken news_agent'ı çalıştırır."""
     print("--- Düğüm 1: Haberler Çekiliyor... ---")
     content = run_news_agent()
+    if content is None:
+        raise ValueError("Haber agent'ı hata verdi (API anahtarı, ağ veya yanıt hatası). Akış durduruluyor.")
     if not content:
+        if NEWS_INCREMENTAL:
+            print("Yeni haber bulunamadı; risk analizi ve web araştırması atlanıyor.")
+            return {"news_articles": ""}
         raise ValueError("Haber agent'ı içerik döndüremedi. Akış durduruluyor.")
     return {"news_articles": content}
 
+def route_after_news(state: WorkflowState):
+    """Yeni haber yoksa sonraki (LLM ve browser) düğümleri atlayıp akışı bitirir."""
+    return "risk_analyst" if state.get('news_articles') else END
+
+def parse_json_response(text):
+    """LLM yanıtındaki ```json çitlerini temizleyip JSON olarak çözer."""
+    return json.loads(text.strip().replace("```json", "").replace("```", ""))
+
+def has_search_prompts(response_text):
+    """Risk analisti yanıtı önbelleğe alınabilir mi: en az bir arama sorgusu içeren bir JSON nesnesi."""
+    analysis = parse_json_response(response_text)
+    return bool(analysis.get('search_prompts') or analysis.get('search_prompt'))
+
+def is_supplier_list(response_text):
+    """Parser yanıtı önbelleğe alınabilir mi: boş olmayan bir JSON listesi."""
+    parsed = parse_json_response(response_text)
+    return isinstance(parsed, list) and len(parsed) > 0
+
 def risk_analyst_node(state: WorkflowState):
-    """Haberleri analiz eder ve browser_agent için bir arama sorgusu (prompt) üretir."""
+    """Haberleri analiz eder ve en kritik RISK_TOP_N risk için browser_agent arama sorgularını (prompt) üretir."""
+    if state.get('categories'):
+        return batch_risk_analyst(state)
     print("--- Düğüm 2: Risk Analizi Yapılıyor... ---")
-    llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro-latest", temperature=0)
+    model_name = "gemini-1.5-pro-latest"
     
     prompt_template = f"""
     You are a senior supply chain risk analyst for Ford Otosan. Analyze the following news articles, 
-    separated by '--- ARTICLE SEPARATOR ---', and identify the SINGLE MOST CRITICAL supply chain risk. 
+    separated by '--- ARTICLE SEPARATOR ---', and identify the TOP {RISK_TOP_N} MOST CRITICAL supply chain risk(s), 
+    each affecting a different material or service, ordered from most to least critical.
 
-    Based on this risk, generate a **web search prompt** that follows this pattern exactly:
+    For each risk, generate a **web search prompt** that follows this pattern exactly:
     "Find 3 company name and contact email for suppliers of <material/service>: 
     {{company_name: ..., email: ...}}"
 
@@ -50,7 +123,7 @@ def risk_analyst_node(state: WorkflowState):
 
     Return your response ONLY as a JSON object in the following format:
     {{
-    "search_prompt": "<your search prompt here>"
+    "search_prompts": ["<your search prompt here>", ...]
     }}
 
     News Articles:
@@ -58,34 +131,151 @@ def risk_analyst_node(state: WorkflowState):
     """
 
     
-    response = llm.invoke(prompt_template)
-    clean_response = response.content.strip().replace("```json", "").replace("```", "")
-    analysis = json.loads(clean_response)
-    print(f"Risk analizi tamamlandı. Yeni arama sorgusu: {analysis['search_prompt']}")
-    return {"search_prompt": analysis['search_prompt']}
+    def call_llm():
+        return get_chat_model(model_name).invoke(prompt_template).content
+
+    response_text = cached_completion("risk_analyst", model_name, prompt_template, call_llm, validate=has_search_prompts)
+    analysis = parse_json_response(response_text)
+    search_prompts = analysis.get('search_prompts') or [analysis['search_prompt']]
+    search_prompts = search_prompts[:RISK_TOP_N]
+    for search_prompt in search_prompts:
+        print(f"Risk analizi tamamlandı. Yeni arama sorgusu: {search_prompt}")
+    return {
+        "search_prompts": search_prompts,
+        "search_categories": [None] * len(search_prompts),
+        "search_prompt": search_prompts[0],
+    }
+
+def batch_risk_analyst(state: WorkflowState):
+    """Toplu mod: tüm kategoriler için arama sorgularını tek bir LLM çağrısıyla üretir."""
+    categories = state['categories']
+    print(f"--- Düğüm 2: Risk Analizi Yapılıyor ({len(categories)} kategori, toplu)... ---")
+    model_name = "gemini-1.5-pro-latest"
 
-def browser_node(state: WorkflowState):
-    """Web'de araştırma yapan browser_agent'ı çalıştırır."""
-    print("--- Düğüm 3: Web'de Araştırma Yapılıyor... ---")
-    output = run_browser_agent(state['search_prompt'])
-    if not output:
-        raise ValueError("Browser agent'ı sonuç döndüremedi. Akış durduruluyor.")
-    return {"browser_output": output}
+    prompt_template = f"""
+    You are a senior supply chain risk analyst for Ford Otosan. Analyze the following news articles,
+    separated by '--- ARTICLE SEPARATOR ---', separately for EACH of the material categories / risk themes below.
+
+    Material categories: {json.dumps(categories)}
 
+    For each category, identify the most critical supply chain risk in the news related to that category
+    and generate a **web search prompt** that follows this pattern exactly:
+    "Find 3 company name and contact email for suppliers of <material/service>:
+    {{company_name: ..., email: ...}}"
 
+    Replace <material/service> with the specific item or service within the category that is affected by the risk.
+    Your goal is to search for **alternative suppliers** to mitigate the identified risk. If the news contains
+    no risk for a category, omit that category.
+
+    Return your response ONLY as a JSON object in the following format, using the category names exactly as given:
+    {{
+    "search_prompts": [{{"category": "<category>", "search_prompt": "<your search prompt here>"}}, ...]
+    }}
+
+    News Articles:
+    {state['news_articles']}
+    """
+
+    def call_llm():
+        return get_chat_model(model_name).invoke(prompt_template).content
+
+    response_text = cached_completion("risk_analyst", model_name, prompt_template, call_llm, validate=has_search_prompts)
+    analysis = parse_json_response(response_text)
+    entries = [entry for entry in analysis.get('search_prompts', []) if entry.get('category') in categories]
+    if not entries:
+        raise ValueError("Risk analizi hiçbir kategori için arama sorgusu üretmedi. Akış durduruluyor.")
+    for category in categories:
+        if not any(entry['category'] == category for entry in entries):
+            print(f"UYARI: '{category}' kategorisi için haberlerde risk bulunamadı, atlanıyor.")
+    for entry in entries:
+        print(f"Risk analizi tamamlandı. [{entry['category']}] arama sorgusu: {entry['search_prompt']}")
+    return {
+        "search_prompts": [entry['search_prompt'] for entry in entries],
+        "search_categories": [entry['category'] for entry in entries],
+        "search_prompt": entries[0]['search_prompt'],
+    }
+
+def fan_out_browser_tasks(state: WorkflowState):
+    """Her arama sorgusu için ayrı bir browser_agent dalı başlatır; dallar paralel çalışır."""
+    categories = state.get('search_categories') or [None] * len(state['search_prompts'])
+    return [
+        Send("browser_agent", {
+            "search_prompt": prompt, "category": category, "refresh_research": state.get('refresh_research', False),
+        })
+        for prompt, category in zip(state['search_prompts'], categories)
+    ]
+
+def browser_node(state: WorkflowState):
+    """Web'de araştırma yapan browser_agent'ı çalıştırır (en fazla BROWSER_MAX_CONCURRENCY dal aynı anda)."""
+    print("--- Düğüm 3: Web'de Araştırma Yapılıyor... ---")
+    result = run_browser_research(state['search_prompt'], refresh=state.get('refresh_research') or BROWSER_CACHE_REFRESH)
+    if not result or not result.get('output'):
+        print(f"UYARI: Browser agent'ı sonuç döndüremedi: {state['search_prompt']}")
+        return {"browser_outputs": []}
+    return {"browser_outputs": [{
+        "category": state.get('category'), "search_prompt": state['search_prompt'],
+        "output": result['output'], "final_result": result.get('final_result'),
+    }]}
 
-import json
-import re
 
-def is_valid_email(email: str) -> bool:
-    """Basit bir regex ile email formatını doğrular."""
-    email_regex = r"^[\w\.-]+@[\w\.-]+\.\w{2,}$"
-    return re.match(email_regex, email) is not None
 
 def parser_node(state: WorkflowState):
-    """Browser agent'ın ham çıktısını analiz edip temiz bir JSON'a dönüştürür."""
+    """
+    Browser agent'ın ham çıktısını analiz edip temiz bir JSON'a dönüştürür.
+    Önce kural tabanlı çıkarıcı, varsa agent'ın nihai sonucu (final_result) üzerinde,
+    orada tedarikçi bulamazsa tam geçmiş dökümü üzerinde çalışır; parser LLM'i yalnızca
+    kuralların güvenle çözemediği email'leri içeren metinler için çağrılır. Her tedarikçinin hangi yoldan
+    geldiği `extraction_source` alanında ("rules" / "llm") belirtilir.
+    Toplu modda çıktılar kategori bazında ayrı ayrıştırılır ve her tedarikçi kategorisiyle etiketlenir.
+    """
     print("--- Düğüm 4: Araştırma Sonuçları Ayıklanıyor... ---")
-    llm = ChatGoogleGenerativeAI(model="models/gemini-1.5-flash-latest", temperature=0)
+    if not state.get('browser_outputs'):
+        raise ValueError("Browser agent'ı sonuç döndüremedi. Akış durduruluyor.")
+    outputs_by_category = {}
+    for item in state['browser_outputs']:
+        outputs_by_category.setdefault(item['category'], []).append(item)
+
+    filtered_list = []
+    llm_calls = 0
+    for category, items in outputs_by_category.items():
+        suppliers = []
+        unresolved_outputs = []
+        for item in items:
+            product_name = extract_material(item.get('search_prompt', ''))
+            texts = [item['final_result'], item['output']] if item.get('final_result') else [item['output']]
+            for text in texts:
+                found, unresolved = extract_with_rules(text, product_name)
+                if found:
+                    break
+            suppliers.extend(dict(supplier, extraction_source=SOURCE_RULES) for supplier in found)
+            if unresolved or not found:
+                unresolved_outputs.append(text)
+
+        if unresolved_outputs:
+            llm_calls += 1
+            known_emails = {normalize_email(supplier['email']) for supplier in suppliers}
+            suppliers.extend(
+                dict(supplier, extraction_source=SOURCE_LLM)
+                for supplier in extract_suppliers("\n\n".join(unresolved_outputs))
+                if normalize_email(supplier['email']) not in known_emails
+            )
+        if category:
+            suppliers = [dict(supplier, category=category) for supplier in suppliers]
+        filtered_list.extend(suppliers)
+
+    from_rules = sum(1 for supplier in filtered_list if supplier['extraction_source'] == SOURCE_RULES)
+    record("suppliers_from_rules", from_rules)
+    record("suppliers_from_llm", len(filtered_list) - from_rules)
+    print(
+        f"Kural tabanlı çıkarıcı: {from_rules} tedarikçi, parser LLM'i: {len(filtered_list) - from_rules} tedarikçi "
+        f"({llm_calls} LLM çağrısı)."
+    )
+    print(f"Ayıklanan Tedarikçiler (Geçerli Email ile Filtrelenmiş JSON): {json.dumps(filtered_list, indent=2)}")
+    return {"suppliers_json": filtered_list}
+
+def extract_suppliers(browser_output):
+    """Parser LLM'i ile metindeki tedarikçileri çıkarır ve geçerli email'i olmayanları eler."""
+    model_name = "models/gemini-1.5-flash-latest"
     
     prompt_template = f"""
     Analyze the text below which contains information about potential suppliers.
@@ -99,19 +289,16 @@ def parser_node(state: WorkflowState):
     [{{"company_name": "Example Steel Corp.", "email": "contact@examplesteel.com", "product_name": "High-strength steel plates"}}, ...]
 
     Text:
-    {state['browser_output']}
+    {browser_output}
     """
-    response = llm.invoke(prompt_template)
-
-    if isinstance(response.content, list):
-        raw_text = " ".join(response.content)
-    else:
-        raw_text = response.content
+    def call_llm():
+        content = get_chat_model(model_name).invoke(prompt_template).content
+        return " ".join(content) if isinstance(content, list) else content
 
-    raw_output = raw_text.strip().replace("```json", "").replace("```", "")
+    raw_text = cached_completion("parser", model_name, prompt_template, call_llm, validate=is_supplier_list)
 
     try:
-        parsed_list = json.loads(raw_output)
+        parsed_list = parse_json_response(raw_text)
         filtered_list = [
             item for item in parsed_list
             if item.get("email") and item["email"].strip() != "" and is_valid_email(item["email"].strip())
@@ -119,25 +306,19 @@ def parser_node(state: WorkflowState):
     except json.JSONDecodeError as e:
         print(f"❌ JSON parse hatası: {e}")
         filtered_list = []
-
-    print(f"Ayıklanan Tedarikçiler (Geçerli Email ile Filtrelenmiş JSON): {json.dumps(filtered_list, indent=2)}")
-    return {"suppliers_json": filtered_list}
+    return filtered_list
 
 def save_to_db_node(state: WorkflowState):
-    """Parser'dan gelen JSON verisini MongoDB'ye kaydeder."""
+    """
+    Parser'dan gelen tedarikçileri normalize email anahtarıyla MongoDB'ye upsert eder.
+    Mevcut tedarikçilerin durumu (status) değiştirilmez, böylece tekrar e-posta gönderilmez.
+    Toplu modda tedarikçinin bulunduğu kategoriler `categories` listesine eklenir.
+    """
     print("--- Ara Katman: Veritabanına Kaydediliyor... ---")
     
-    mongo_uri = os.getenv("MONGO_URI")
-    db_name = os.getenv("DB_NAME", "ai_agent_db")
-    collection_name = "mailing_list" # Hedef koleksiyon
-    
-    if not mongo_uri:
-        raise ValueError("MONGO_URI ortam değişkeni .env dosyasında bulunamadı.")
-        
     try:
-        client = MongoClient(mongo_uri)
-        db = client[db_name]
-        collection = db[collection_name]
+        db = get_database()
+        collection = db[MAILING_LIST_COLLECTION]
         
         suppliers = state['suppliers_json']
         
@@ -146,11 +327,35 @@ def save_to_db_node(state: WorkflowState):
             print(status_message)
             return {"db_status": status_message}
 
+        unique_suppliers = {}
+        skipped = 0
         for supplier in suppliers:
-            supplier['status'] = 'pending'
-            
-        result = collection.insert_many(suppliers)
-        status_message = f"{len(result.inserted_ids)} adet yeni tedarikçi veritabanına eklendi."
+            email_normalized = normalize_email(supplier["email"])
+            if email_normalized in unique_suppliers:
+                skipped += 1
+            else:
+                fields = {key: value for key, value in supplier.items() if key not in ("status", "category")}
+                unique_suppliers[email_normalized] = (fields, [])
+            category = supplier.get("category")
+            categories = unique_suppliers[email_normalized][1]
+            if category and category not in categories:
+                categories.append(category)
+
+        operations = []
+        for email_normalized, (fields, categories) in unique_suppliers.items():
+            update = {"$set": fields, "$setOnInsert": {"email_normalized": email_normalized, "status": "pending"}}
+            if categories:
+                update["$addToSet"] = {"categories": {"$each": categories}}
+            operations.append(UpdateOne({"email_normalized": email_normalized}, update, upsert=True))
+
+        result = collection.bulk_write(operations, ordered=False)
+        inserted = result.upserted_count
+        updated = result.modified_count
+        skipped += result.matched_count - result.modified_count
+        status_message = (
+            f"{inserted} adet yeni tedarikçi veritabanına eklendi "
+            f"({updated} güncellendi, {skipped} değişiklik olmadan atlandı)."
+        )
         print(status_message)
         return {"db_status": status_message}
 
@@ -163,37 +368,186 @@ def email_agent_node(state: WorkflowState):
     """Veritabanındaki yeni tedarikçilere ilk e-postayı gönderen agent'ı çalıştırır."""
     print("--- Düğüm 5: E-posta Agent'ı Çalıştırılıyor... ---")
     status = run_email_agent() 
+    if status is None:
+        raise ValueError("E-posta agent'ı çalıştırılamadı. Akış durduruluyor.")
     return {"final_status": status}
 
 
+def node(node_name, node_fn):
+    """
+    Düğümü olay akışı (events) ve ölçüm (metrics) katmanlarıyla sarar. Düğüm için
+    NODE_CONCURRENCY_LIMITS'te sınır varsa boş yer beklenir; bekleme süresi düğüm
+    süresine sayılmaz.
+    """
+    wrapped = traced_node(node_name, instrument_node(node_name, node_fn))
+    slots = node_slots.get(node_name)
+    if slots is None:
+        return wrapped
+
+    def limited(state):
+        with slots:
+            return wrapped(state)
+
+    return limited
+
+
 workflow = StateGraph(WorkflowState)
 
-workflow.add_node("news_agent", news_node)
-workflow.add_node("risk_analyst", risk_analyst_node)
-workflow.add_node("browser_agent", browser_node)
-workflow.add_node("parser", parser_node)
-workflow.add_node("save_to_db", save_to_db_node) 
-workflow.add_node("email_agent", email_agent_node)
+workflow.add_node("news_agent", node("news_agent", news_node))
+workflow.add_node("risk_analyst", node("risk_analyst", risk_analyst_node))
+workflow.add_node("browser_agent", node("browser_agent", browser_node))
+workflow.add_node("parser", node("parser", parser_node))
+workflow.add_node("save_to_db", node("save_to_db", save_to_db_node)) 
+workflow.add_node("email_agent", node("email_agent", email_agent_node))
 
 
 workflow.set_entry_point("news_agent")
-workflow.add_edge("news_agent", "risk_analyst")
-workflow.add_edge("risk_analyst", "browser_agent")
+workflow.add_conditional_edges("news_agent", route_after_news, ["risk_analyst", END])
+workflow.add_conditional_edges("risk_analyst", fan_out_browser_tasks, ["browser_agent"])
 workflow.add_edge("browser_agent", "parser")
 workflow.add_edge("parser", "save_to_db")
 workflow.add_edge("save_to_db", "email_agent")
 workflow.add_edge("email_agent", END)
 
 
+def get_checkpointer(path=CHECKPOINT_PATH):
+    """
+    Run kimliği (thread_id) başına durumu SQLite'a yazan LangGraph checkpointer'ını döndürür.
+    langgraph-checkpoint-sqlite paketi kurulu değilse uyarı verip None döndürür.
+    """
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError:
+        print("UYARI: langgraph-checkpoint-sqlite kurulu değil; çalıştırma checkpoint'siz sürdürülüyor.")
+        return None
+
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+
 app = workflow.compile()
 
-if __name__ == "__main__":
-    print("🚀 Agentic İş Akışı Başlatılıyor...")
-    initial_state = {} 
+def execute_run(compiled_app, run_id, initial_state, checkpointing=True):
+    """
+    Tek bir çalıştırmayı yürütür. Olaylar ve ölçümler run id ile etiketlenir; böylece aynı
+    süreçte üst üste binen çalıştırmalar (scheduler) birbirine karışmaz. Başarılıysa True döner.
+    """
+    event_run.set(run_id)
+    start_run(run_id)
+    config = {"configurable": {"thread_id": run_id}}
+    emit_event("run_start", resumed=initial_state is None)
+    run_started = time.perf_counter()
     try:
-        for event in app.stream(initial_state):
+        for event in compiled_app.stream(initial_state, config):
             node_name = list(event.keys())[0]
             print(f"✅ Düğüm Tamamlandı: {node_name}")
-        print("\n🏁 Agentic İş Akışı Başarıyla Tamamlandı!")
+        print(f"\n🏁 Agentic İş Akışı Başarıyla Tamamlandı! (run id: {run_id})")
+        emit_event("run_end", status="success", duration=time.perf_counter() - run_started)
+        return True
     except Exception as e:
         print(f"\n❌ İŞ AKIŞI SIRASINDA BİR HATA OLUŞTU: {e}")
+        if checkpointing:
+            print(f"Kaldığı yerden sürdürmek için: python main_orchestrator.py --resume {run_id}")
+        emit_event("run_end", status="error", error=str(e), duration=time.perf_counter() - run_started)
+        return False
+    finally:
+        json_path, prom_path = export_run(run_id=run_id)
+        discard_run(run_id)
+        print(f"Ölçümler kaydedildi: {json_path}, {prom_path}")
+
+
+def run_scheduler(compiled_app, interval, max_overlap, initial_state, checkpointing=True):
+    """
+    Graph bir kez derlenmiş haldeyken her `interval` saniyede bir yeni çalıştırma başlatır.
+    Önceki çalıştırma bitmeden sonraki başlayabilir (örn. yeni news_agent, önceki run
+    browser_agent'tayken); aynı anda en fazla `max_overlap` çalıştırma sürer, düğüm bazındaki
+    sınırlar NODE_CONCURRENCY_LIMITS ve BROWSER_MAX_CONCURRENCY ile korunur.
+    Ctrl+C ile durdurulduğunda süren çalıştırmaların bitmesi beklenir.
+    """
+    print(f"⏱️ Scheduler başlatıldı: her {interval:g} sn'de bir çalıştırma, en fazla {max_overlap} eşzamanlı.")
+    executor = ThreadPoolExecutor(max_workers=max_overlap)
+    in_flight = set()
+    try:
+        while True:
+            in_flight = {future for future in in_flight if not future.done()}
+            if len(in_flight) < max_overlap:
+                run_id = uuid.uuid4().hex
+                print(f"🚀 Agentic İş Akışı Başlatılıyor... (run id: {run_id})")
+                # Her çalıştırma kendi context'inde yürür; run id'ler iş parçacıkları arasında karışmaz.
+                context = contextvars.copy_context()
+                in_flight.add(executor.submit(
+                    context.run, execute_run, compiled_app, run_id, dict(initial_state), checkpointing
+                ))
+            else:
+                print(f"UYARI: {len(in_flight)} çalıştırma hâlâ sürüyor; bu tur atlanıyor.")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("Scheduler durduruluyor; süren çalıştırmaların bitmesi bekleniyor...")
+    finally:
+        executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Agentic tedarik zinciri iş akışını çalıştırır.")
+    parser.add_argument("--events", help="Düğüm olaylarının JSON satırları olarak yazılacağı dosya")
+    parser.add_argument("--run-id", help="Yeni çalıştırma için kimlik (varsayılan: rastgele)")
+    parser.add_argument("--resume", metavar="RUN_ID", help="Yarım kalan çalıştırmayı son tamamlanan düğümden sürdürür")
+    parser.add_argument("--no-checkpoint", action="store_true", help="Durumu checkpoint veritabanına yazmadan çalıştırır")
+    parser.add_argument(
+        "--categories",
+        help="Toplu mod: virgülle ayrılmış malzeme kategorileri / risk temaları (örn. 'steel,chips,lithium'); "
+             "haberler bir kez çekilir, tüm kategoriler tek LLM çağrısıyla analiz edilir",
+    )
+    parser.add_argument(
+        "--refresh-research", action="store_true",
+        help="Browser araştırma önbelleğini atlar; tüm sorgular tarayıcıda yeniden araştırılır",
+    )
+    parser.add_argument(
+        "--schedule", type=float, metavar="SANIYE",
+        help="Scheduler modu: süreç açık kalır ve her SANIYE'de bir yeni çalıştırma başlatılır",
+    )
+    parser.add_argument(
+        "--max-overlap", type=int, default=int(os.getenv("SCHEDULER_MAX_OVERLAP", "2")),
+        help="Scheduler modunda aynı anda sürebilecek en fazla çalıştırma (varsayılan: 2)",
+    )
+    args = parser.parse_args()
+
+    checkpointer = None if args.no_checkpoint else get_checkpointer()
+    checkpointing = checkpointer is not None
+    checkpointed_app = workflow.compile(checkpointer=checkpointer) if checkpointing else app
+    initial_state = {}
+    if args.refresh_research:
+        initial_state["refresh_research"] = True
+    if args.categories:
+        initial_state["categories"] = [c.strip() for c in args.categories.split(",") if c.strip()]
+        print(f"Toplu mod: {', '.join(initial_state['categories'])}")
+
+    if args.schedule:
+        set_event_sink(args.events, None)
+        try:
+            run_scheduler(checkpointed_app, args.schedule, max(1, args.max_overlap), initial_state, checkpointing)
+        finally:
+            close_event_sink()
+        raise SystemExit(0)
+
+    run_id = args.resume or args.run_id or uuid.uuid4().hex
+    set_event_sink(args.events, run_id)
+    if args.resume and not checkpointing:
+        print("HATA: --resume için checkpoint veritabanı gerekli (langgraph-checkpoint-sqlite kurulu olmalı, --no-checkpoint verilmemeli).")
+        close_event_sink()
+        raise SystemExit(1)
+    if args.resume:
+        pending = checkpointed_app.get_state({"configurable": {"thread_id": run_id}}).next
+        if not pending:
+            print(f"Run {run_id} için sürdürülecek düğüm bulunamadı (tamamlanmış veya hiç başlamamış).")
+            close_event_sink()
+            raise SystemExit(0)
+        print(f"🔁 Run {run_id} sürdürülüyor. Kalan düğümler: {', '.join(pending)}")
+        initial_state = None
+    else:
+        print(f"🚀 Agentic İş Akışı Başlatılıyor... (run id: {run_id})")
+    try:
+        execute_run(checkpointed_app, run_id, initial_state, checkpointing)
+    finally:
+        close_event_sink()
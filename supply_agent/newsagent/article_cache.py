@@ -0,0 +1,120 @@
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "articles.sqlite3"
+)
+
+STATUS_VALID = "valid"
+STATUS_REJECTED = "rejected"
+
+
+class ArticleCache:
+    """
+    URL anahtarlı, SQLite tabanlı makale önbelleği.
+    Geçerli metinleri TTL süresince saklar; login/paywall nedeniyle reddedilen
+    URL'leri de (negatif önbellek) hatırlar, böylece tekrar indirilmezler.
+    Toplam boyut `max_bytes` değerini aşınca en eski kayıtlar silinir.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=48 * 3600,
+                 negative_ttl_seconds=24 * 3600, max_bytes=50 * 1024 * 1024):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS articles (
+                url_hash TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                status TEXT NOT NULL,
+                text TEXT,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_articles_fetched_at ON articles (fetched_at)")
+        self.conn.commit()
+
+    @staticmethod
+    def _key(url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """
+        (status, text) döndürür; kayıt yoksa veya süresi dolmuşsa None döner.
+        status değeri STATUS_VALID ya da STATUS_REJECTED'dir.
+        """
+        row = self.conn.execute(
+            "SELECT status, text, fetched_at FROM articles WHERE url_hash = ?", (self._key(url),)
+        ).fetchone()
+        if row:
+            status, text, fetched_at = row
+            ttl = self.ttl_seconds if status == STATUS_VALID else self.negative_ttl_seconds
+            if time.time() - fetched_at <= ttl:
+                if status == STATUS_VALID:
+                    self.hits += 1
+                else:
+                    self.negative_hits += 1
+                return status, text
+        self.misses += 1
+        return None
+
+    def put(self, url, text, valid):
+        """Çekilen metni (geçerli ise) ya da reddedilen URL'yi kaydeder."""
+        status = STATUS_VALID if valid else STATUS_REJECTED
+        stored_text = text if valid else None
+        size = len(stored_text.encode("utf-8")) if stored_text else 0
+        self.conn.execute(
+            "INSERT OR REPLACE INTO articles (url_hash, url, status, text, size, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (self._key(url), url, status, stored_text, size, time.time()),
+        )
+        self.conn.commit()
+
+    def evict(self):
+        """Süresi dolan kayıtları siler, ardından boyut sınırına inene kadar en eskileri atar."""
+        now = time.time()
+        self.conn.execute(
+            "DELETE FROM articles WHERE (status = ? AND fetched_at < ?) OR (status = ? AND fetched_at < ?)",
+            (STATUS_VALID, now - self.ttl_seconds, STATUS_REJECTED, now - self.negative_ttl_seconds),
+        )
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM articles").fetchone()[0]
+        if total > self.max_bytes:
+            rows = self.conn.execute("SELECT url_hash, size FROM articles ORDER BY fetched_at ASC").fetchall()
+            for url_hash, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM articles WHERE url_hash = ?", (url_hash,))
+                total -= size
+        self.conn.commit()
+
+    def report(self):
+        print(
+            f"DEBUG: Makale önbelleği - isabet: {self.hits}, negatif isabet: {self.negative_hits}, ıska: {self.misses}",
+            file=sys.stderr,
+        )
+
+    def close(self):
+        self.conn.close()
+
+
+def get_article_cache():
+    """Ortam değişkenlerine göre önbelleği oluşturur; NEWS_CACHE_ENABLED=0 ise None döner."""
+    if os.getenv("NEWS_CACHE_ENABLED", "1") == "0":
+        return None
+    return ArticleCache(
+        path=os.getenv("NEWS_CACHE_PATH", DEFAULT_CACHE_PATH),
+        ttl_seconds=float(os.getenv("NEWS_CACHE_TTL", str(48 * 3600))),
+        negative_ttl_seconds=float(os.getenv("NEWS_CACHE_NEGATIVE_TTL", str(24 * 3600))),
+        max_bytes=int(os.getenv("NEWS_CACHE_MAX_BYTES", str(50 * 1024 * 1024))),
+    )
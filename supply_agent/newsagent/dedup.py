@@ -0,0 +1,94 @@
+import hashlib
+import os
+import re
+import sqlite3
+import sys
+import time
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "article_dedup.sqlite3"
+)
+
+SHINGLE_SIZE = 5
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def simhash(text, shingle_size=SHINGLE_SIZE):
+    """Metnin kelime shingle'larından 64 bitlik SimHash parmak izini hesaplar."""
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = {
+        " ".join(words[i:i + shingle_size]) for i in range(max(1, len(words) - shingle_size + 1))
+    }
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """
+    Aynı ajans haberinin farklı kaynaklardaki kopyalarını SimHash ile tespit eder.
+    Bu çalıştırmada seçilen makaleler ve önceki çalıştırmalarda görülen makaleler
+    (`ttl_seconds` boyunca) SQLite'ta saklanır. Aynı URL kendi kopyası sayılmaz.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, max_distance=8, ttl_seconds=7 * 24 * 3600):
+        self.max_distance = max_distance
+        self.ttl_seconds = ttl_seconds
+        self.duplicates = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS fingerprints (
+                url TEXT PRIMARY KEY,
+                simhash TEXT NOT NULL,
+                seen_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("DELETE FROM fingerprints WHERE seen_at < ?", (time.time() - ttl_seconds,))
+        self.conn.commit()
+        self.entries = [
+            (url, int(fingerprint, 16)) for url, fingerprint in self.conn.execute("SELECT url, simhash FROM fingerprints")
+        ]
+
+    def find_duplicate(self, url, text):
+        """Metin, başka bir URL'deki kayıtlı bir makalenin yakın kopyasıysa o URL'yi döndürür."""
+        fingerprint = simhash(text)
+        for other_url, other_fingerprint in self.entries:
+            if other_url != url and hamming_distance(fingerprint, other_fingerprint) <= self.max_distance:
+                self.duplicates += 1
+                return other_url
+        return None
+
+    def add(self, url, text):
+        fingerprint = simhash(text)
+        self.entries = [(u, f) for u, f in self.entries if u != url] + [(url, fingerprint)]
+        self.conn.execute(
+            "INSERT OR REPLACE INTO fingerprints (url, simhash, seen_at) VALUES (?, ?, ?)",
+            (url, format(fingerprint, "016x"), time.time()),
+        )
+        self.conn.commit()
+
+    def report(self):
+        print(f"DEBUG: Yakın kopya tespiti - elenen makale: {self.duplicates}", file=sys.stderr)
+
+    def close(self):
+        self.conn.close()
+
+
+def get_dedup_index():
+    """Ortam değişkenlerine göre indeksi oluşturur; NEWS_DEDUP_ENABLED=0 ise None döner."""
+    if os.getenv("NEWS_DEDUP_ENABLED", "1") == "0":
+        return None
+    return NearDuplicateIndex(
+        path=os.getenv("NEWS_DEDUP_PATH", DEFAULT_INDEX_PATH),
+        max_distance=int(os.getenv("NEWS_DEDUP_MAX_DISTANCE", "8")),
+        ttl_seconds=float(os.getenv("NEWS_DEDUP_TTL", str(7 * 24 * 3600))),
+    )
@@ -1,101 +1,338 @@
+import codecs
+import contextvars
+import html
 import os
+import re
 import sys
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from newspaper import Article, ArticleException, Config
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 
+try:
+    from newsagent.article_cache import get_article_cache, STATUS_VALID
+    from newsagent.watermark import NewsWatermark
+    from newsagent.dedup import get_dedup_index
+    from newsagent.ranking import estimate_tokens, pack_articles, query_terms_from_keywords, truncate_to_budget
+except ImportError:
+    from article_cache import get_article_cache, STATUS_VALID
+    from watermark import NewsWatermark
+    from dedup import get_dedup_index
+    from ranking import estimate_tokens, pack_articles, query_terms_from_keywords, truncate_to_budget
+
+try:
+    from tools.metrics import record
+except ImportError:
+    # Script olarak tek başına çalıştırıldığında ölçüm katmanı yoktur.
+    def record(metric, value=1, node=None):
+        pass
+
 load_dotenv()
 
-def get_full_article_text(url):
-    """Verilen URL'den makalenin tam metnini güvenli bir şekilde çeker."""
+MAX_VALID_ARTICLES = 3
+# Sıralama açıkken değerlendirilecek en fazla geçerli makale ve risk analistine
+# gönderilecek haber metninin token bütçesi (~4 karakter/token).
+NEWS_RANKING_ENABLED = os.getenv("NEWS_RANKING_ENABLED", "1") == "1"
+RANKING_MAX_ARTICLES = int(os.getenv("NEWS_RANKING_MAX_ARTICLES", "10"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("NEWS_CONTEXT_TOKEN_BUDGET", "2000"))
+# Aynı anda indirilecek en fazla makale sayısı ve URL başına zaman aşımı (saniye).
+FETCH_MAX_WORKERS = int(os.getenv("NEWS_FETCH_MAX_WORKERS", "5"))
+FETCH_TIMEOUT = float(os.getenv("NEWS_FETCH_TIMEOUT", "10"))
+# Artımlı mod: yalnızca daha önce işlenmemiş makaleler çekilir.
+NEWS_INCREMENTAL = os.getenv("NEWS_INCREMENTAL", "0") == "1"
+# Yerel test/benchmark sunucusuna yönlendirmek için değiştirilebilir.
+NEWS_API_BASE_URL = os.getenv("NEWS_API_BASE_URL", "https://newsapi.org")
+# Bağlantı zaman aşımı ve makale başına indirilecek en fazla bayt.
+FETCH_CONNECT_TIMEOUT = float(os.getenv("NEWS_FETCH_CONNECT_TIMEOUT", "5"))
+FETCH_MAX_BYTES = int(os.getenv("NEWS_FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+MIN_ARTICLE_LENGTH = 300
+FORBIDDEN_WORDS = ["log in", "login", "subscribe", "password", "user id", "create an account"]
+INVISIBLE_BLOCK_PATTERN = re.compile(r"<(script|style|noscript|template)\b.*?</\1\s*>|<!--.*?-->", re.IGNORECASE | re.DOTALL)
+TAG_PATTERN = re.compile(r"<[^>]+>")
+
+# Tüm indirmeler aynı bağlantı havuzunu kullanır.
+session = requests.Session()
+session.headers["User-Agent"] = USER_AGENT
+_adapter = HTTPAdapter(pool_connections=FETCH_MAX_WORKERS, pool_maxsize=FETCH_MAX_WORKERS)
+session.mount("http://", _adapter)
+session.mount("https://", _adapter)
+
+def fetch_html(url, timeout=FETCH_TIMEOUT, max_bytes=FETCH_MAX_BYTES):
+    """
+    Sayfayı akış (stream) olarak indirir; en fazla `max_bytes` bayt okunur ve toplam
+    süre `timeout` saniyeyi geçerse okuma kesilir. Okunan kısım metin olarak döner.
+    """
+    deadline = time.monotonic() + timeout
+    chunks = []
+    size = 0
+    with session.get(url, stream=True, timeout=(FETCH_CONNECT_TIMEOUT, timeout)) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=16 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= max_bytes or time.monotonic() > deadline:
+                break
+        content_type = response.headers.get("Content-Type", "")
+    record("bytes_downloaded", size)
+    content = b"".join(chunks)[:max_bytes]
+    return content.decode(detect_encoding(content, content_type), errors='replace')
+
+def detect_encoding(content, content_type):
+    """
+    Content-Type'ta charset varsa onu, yoksa (requests bu durumda ISO-8859-1 varsayar)
+    sayfadaki <meta charset> bildirimini, o da yoksa içerikten tahmin edilen kodlamayı kullanır.
+    """
+    if "charset" in content_type.lower():
+        return requests.utils.get_encoding_from_headers({"content-type": content_type})
+    for declared in requests.utils.get_encodings_from_content(content[:4096].decode("ascii", errors="ignore")):
+        try:
+            return codecs.lookup(declared).name
+        except LookupError:
+            continue
+    return requests.compat.chardet.detect(content[:64 * 1024]).get("encoding") or "utf-8"
+
+def passes_precheck(page_html):
+    """
+    Tam ayrıştırmadan önce ucuz kontrol: sayfadaki görünür metnin tamamı MIN_ARTICLE_LENGTH'ten
+    kısaysa newspaper'ın çıkaracağı metin de kısa olacağından makale is_valid_article_text'ten
+    geçemez. Yasaklı kelime kontrolü menü/footer metnini de içereceği için burada yapılmaz;
+    çıkarılmış metin üzerinde is_valid_article_text'e bırakılır.
+    """
+    # Boşluklar daraltılmaz: çıkarılmış metindeki paragraf araları da uzunluğa sayılır.
+    visible_text = html.unescape(TAG_PATTERN.sub(" ", INVISIBLE_BLOCK_PATTERN.sub(" ", page_html)))
+    return len(visible_text.strip()) >= MIN_ARTICLE_LENGTH
+
+# Sayfa indirilemediğinde/ayrıştırılamadığında döner; geçici bir hata olabileceğinden
+# önbelleğe "reddedildi" olarak yazılmaz ve URL işlenmiş sayılmaz.
+FETCH_FAILED = object()
+
+def get_full_article_text(url, timeout=FETCH_TIMEOUT):
+    """
+    Verilen URL'den makalenin tam metnini güvenli bir şekilde çeker. İndirilen sayfa ön
+    kontrolden geçmezse boş metin, ağ/ayrıştırma hatasında FETCH_FAILED döner.
+    """
     if not url:
-        return None
+        return FETCH_FAILED
     try:
+        page_html = fetch_html(url, timeout)
+        if not passes_precheck(page_html):
+            return ""
+
         config = Config()
-        config.browser_user_agent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
+        config.browser_user_agent = USER_AGENT
         
         article_obj = Article(url, config=config, language='en')
-        article_obj.download()
+        article_obj.download(input_html=page_html)
         article_obj.parse()
-        return article_obj.text if article_obj.text else None
-    except (ArticleException, ValueError):
-        return None
+        return article_obj.text or ""
+    except (ArticleException, ValueError, requests.exceptions.RequestException):
+        return FETCH_FAILED
 
 def is_valid_article_text(text):
-    if not text or len(text) < 300:  
+    if not text or len(text) < MIN_ARTICLE_LENGTH:  
         return False
 
-    forbidden_words = ["log in", "login", "subscribe", "password", "user id", "create an account"]
     text_lower = text.lower()
     
-    for word in forbidden_words:
+    for word in FORBIDDEN_WORDS:
         if word in text_lower:
             return False
             
     return True
 
-def main():
-    """Ana fonksiyon."""
+def collect_valid_articles(urls, limit=MAX_VALID_ARTICLES, max_workers=FETCH_MAX_WORKERS, timeout=FETCH_TIMEOUT, cache=None, evaluated_urls=None, dedup=None):
+    """
+    Makaleleri sınırlı sayıda iş parçacığıyla paralel indirir, ancak NewsAPI sırasını
+    korur: sonuçlar sırayla değerlendirilir ve ilk `limit` geçerli metin döndürülür.
+    Yeterli metin bulunduğunda bekleyen indirmeler iptal edilir.
+    `cache` verilirse önbellekte olan URL'ler hiç indirilmez. `evaluated_urls` listesi
+    verilirse kesin sonuca ulaşılan (zaman aşımına veya indirme hatasına uğramayan) URL'ler eklenir.
+    `dedup` verilirse daha önce seçilmiş bir haberin yakın kopyası olan metinler atlanır.
+    """
+    valid_articles_texts = []
+
+    def accept(article_url, text):
+        duplicate_of = dedup.find_duplicate(article_url, text) if dedup else None
+        if duplicate_of:
+            print(f"DEBUG: Makale {duplicate_of} ile neredeyse aynı, atlanıyor: {article_url}", file=sys.stderr)
+            return
+        if dedup:
+            dedup.add(article_url, text)
+        valid_articles_texts.append(text)
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        candidates = []
+        for url in urls:
+            cached = cache.get(url) if cache and url else None
+            # Ölçümlerin doğru düğüme yazılması için context iş parçacığına taşınır.
+            future = None if cached else executor.submit(contextvars.copy_context().run, get_full_article_text, url, timeout)
+            candidates.append((url, cached, future))
+
+        for article_url, cached, future in candidates:
+            if len(valid_articles_texts) >= limit:
+                break
+
+            if cached:
+                status, cached_text = cached
+                if status == STATUS_VALID:
+                    print(f"DEBUG: Geçerli makale önbellekten alındı: {article_url}", file=sys.stderr)
+                    accept(article_url, cached_text)
+                else:
+                    print(f"DEBUG: Makale daha önce reddedilmiş (önbellek), atlanıyor: {article_url}", file=sys.stderr)
+                if evaluated_urls is not None:
+                    evaluated_urls.append(article_url)
+                continue
+
+            print(f"DEBUG: Makale deneniyor: {article_url}", file=sys.stderr)
+            try:
+                full_text = future.result(timeout=timeout)
+            except FutureTimeoutError:
+                print(f"DEBUG: Makale zaman aşımına uğradı ({timeout}s): {article_url}", file=sys.stderr)
+                continue
+            if full_text is FETCH_FAILED:
+                print(f"DEBUG: Makale indirilemedi, bir sonraki deneniyor: {article_url}", file=sys.stderr)
+                continue
+
+            is_valid = is_valid_article_text(full_text)
+            if evaluated_urls is not None:
+                evaluated_urls.append(article_url)
+            if cache and article_url:
+                cache.put(article_url, full_text, is_valid)
+
+            if is_valid:
+                print(f"DEBUG: Geçerli makale bulundu: {article_url}", file=sys.stderr)
+                accept(article_url, full_text)
+            else:
+                print(f"DEBUG: Makale geçerli değil (login/paywall olabilir), bir sonraki deneniyor...", file=sys.stderr)
+    finally:
+        # Henüz başlamamış indirmeleri iptal et, çalışanları beklemeden dön.
+        executor.shutdown(wait=False, cancel_futures=True)
+    return valid_articles_texts
+
+ARTICLE_SEPARATOR = "\n\n--- ARTICLE SEPARATOR ---\n\n"
+
+RISK_KEYWORDS = [
+    "steel", "aluminum", "semiconductor", "chip", "lithium", "cobalt", "rubber",
+    "logistics", "shipping", "port", "tariff", "strike", "disaster", "shortage","crisis","wars","harbour"
+]
+CONTEXT_KEYWORDS = ["automotive", "car manufacturing", "auto industry", "Ford"]
+
+def rank_and_pack(articles, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Makale paragraflarını RISK_KEYWORDS ve CONTEXT_KEYWORDS'e göre BM25 ile puanlar ve
+    en ilgili paragrafları token bütçesine sığacak şekilde makale metinleri olarak döndürür.
+    """
+    packed = pack_articles(articles, query_terms_from_keywords(RISK_KEYWORDS, CONTEXT_KEYWORDS), token_budget)
+    input_tokens = sum(estimate_tokens(text) for text in articles)
+    output_tokens = sum(estimate_tokens(text) for text in packed)
+    print(
+        f"DEBUG: Sıralama: {len(articles)} makaleden {len(packed)} makale, "
+        f"~{input_tokens} token yerine ~{output_tokens} token (bütçe {token_budget}).",
+        file=sys.stderr,
+    )
+    return packed
+
+def fetch_articles(incremental=NEWS_INCREMENTAL, ranking=NEWS_RANKING_ENABLED):
+    """
+    NewsAPI'den aday makaleleri çeker ve geçerli makale metinlerini liste olarak döndürür.
+    Hiç (yeni) geçerli makale yoksa boş liste, eksik API anahtarı, ağ hatası veya
+    bozuk yanıt gibi hatalarda None döner; böylece hata "haber yok" sanılmaz.
+    Artımlı modda daha önce işlenmiş URL'ler atlanır ve filigran güncellenir.
+    Sıralama açıkken ilk MAX_VALID_ARTICLES yerine RANKING_MAX_ARTICLES geçerli makale
+    toplanır ve yalnızca en ilgili paragraflar CONTEXT_TOKEN_BUDGET içinde döndürülür.
+    """
     api_key = os.getenv("NEWS_API_KEY")
     if not api_key:
         print("HATA: NEWS_API_KEY ortam değişkeni bulunamadı.", file=sys.stderr)
-        return
+        return None
 
-   
-    risk_keywords = [
-        "steel", "aluminum", "semiconductor", "chip", "lithium", "cobalt", "rubber",
-        "logistics", "shipping", "port", "tariff", "strike", "disaster", "shortage","crisis","wars","harbour"
-    ]
-    context_keywords = ["automotive", "car manufacturing", "auto industry", "Ford"]
-    query = f"(({' OR '.join(risk_keywords)}) AND ({' OR '.join(context_keywords)}))"
+    query = f"(({' OR '.join(RISK_KEYWORDS)}) AND ({' OR '.join(CONTEXT_KEYWORDS)}))"
 
     
     two_days_ago = datetime.now() - timedelta(days=2)
     from_date = two_days_ago.strftime('%Y-%m-%d')
+    watermark = NewsWatermark() if incremental else None
+    if watermark:
+        from_date = watermark.from_date(from_date)
 
-    url = f"https://newsapi.org/v2/everything?qInTitle={query}&language=en&from={from_date}&sortBy=publishedAt&pageSize=20&apiKey={api_key}"
+    url = f"{NEWS_API_BASE_URL}/v2/everything?qInTitle={query}&language=en&from={from_date}&sortBy=publishedAt&pageSize=20&apiKey={api_key}"
 
     print(f"DEBUG: NewsAPI'ye gönderilen URL: {url}", file=sys.stderr)
 
     try:
-        response = requests.get(url)
+        response = session.get(url, timeout=(FETCH_CONNECT_TIMEOUT, FETCH_TIMEOUT))
         response.raise_for_status()
+        record("bytes_downloaded", len(response.content))
         data = response.json()
 
         articles = data.get("articles")
         article_count = len(articles) if articles else 0
         print(f"DEBUG: {article_count} adet potansiyel makale bulundu.", file=sys.stderr)
 
+        if watermark and articles:
+            articles = [a for a in articles if not watermark.is_processed(a.get("url"))]
+            print(f"DEBUG: Artımlı mod: {len(articles)} adet işlenmemiş makale var.", file=sys.stderr)
+
         if not articles:
-            return
+            return []
 
-        valid_articles_texts = []
-        for article_data in articles:
-            if len(valid_articles_texts) >= 3:
-                break
+        article_urls = [article_data.get("url") for article_data in articles]
+        evaluated_urls = []
+        cache = get_article_cache()
+        dedup = get_dedup_index()
+        try:
+            limit = RANKING_MAX_ARTICLES if ranking else MAX_VALID_ARTICLES
+            valid_articles_texts = collect_valid_articles(
+                article_urls, limit=limit, cache=cache, evaluated_urls=evaluated_urls, dedup=dedup
+            )
+        finally:
+            if cache:
+                cache.report()
+                cache.evict()
+                cache.close()
+            if dedup:
+                dedup.report()
+                dedup.close()
 
-            article_url = article_data.get("url")
-            print(f"DEBUG: Makale deneniyor: {article_url}", file=sys.stderr)
-            
-            full_text = get_full_article_text(article_url)
-            
-            if is_valid_article_text(full_text):
-                print(f"DEBUG: Geçerli makale bulundu ve listeye eklendi: {article_url}", file=sys.stderr)
-                valid_articles_texts.append(full_text)
-            else:
-                print(f"DEBUG: Makale geçerli değil (login/paywall olabilir), bir sonraki deneniyor...", file=sys.stderr)
+        if watermark:
+            published = {a.get("url"): a.get("publishedAt") for a in articles}
+            for article_url in evaluated_urls:
+                watermark.mark_processed(article_url, published.get(article_url))
+            # Tüm adaylar değerlendirildiyse filigran en yeni makaleye ilerletilir.
+            if len(evaluated_urls) == len(article_urls):
+                watermark.advance(max((p for p in published.values() if p), default=None))
+            watermark.save(oldest_kept=two_days_ago.strftime('%Y-%m-%d'))
         
-        if valid_articles_texts:
-            print("\n\n--- ARTICLE SEPARATOR ---\n\n".join(valid_articles_texts))
-        else:
+        if not valid_articles_texts:
             print("DEBUG: Döngü sonunda hiç geçerli makale bulunamadı.", file=sys.stderr)
+        elif ranking:
+            # Hiçbir paragraf anahtar kelimelerle eşleşmezse sıralanmamış metinlere dönülür;
+            # bunlar da aynı token bütçesine göre kısaltılır.
+            valid_articles_texts = rank_and_pack(valid_articles_texts) or truncate_to_budget(
+                valid_articles_texts[:MAX_VALID_ARTICLES], CONTEXT_TOKEN_BUDGET
+            )
+        return valid_articles_texts
 
 
     except requests.exceptions.RequestException as e:
         print(f"Ağ hatası oluştu: {e}", file=sys.stderr)
     except requests.exceptions.JSONDecodeError:
         print("API'den gelen yanıt JSON formatında değil.", file=sys.stderr)
+    return None
+
+def main():
+    """Ana fonksiyon."""
+    valid_articles_texts = fetch_articles()
+    if valid_articles_texts is None:
+        # Subprocess modda çağıran taraf hatayı sıfırdan farklı çıkış kodundan anlar.
+        sys.exit(1)
+    if valid_articles_texts:
+        print(ARTICLE_SEPARATOR.join(valid_articles_texts))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,123 @@
+import math
+import re
+from collections import Counter
+
+WORD_PATTERN = re.compile(r"\w+")
+PARAGRAPH_SPLIT_PATTERN = re.compile(r"\n\s*\n|\n")
+# Paragraftan kısa parçalar (başlık, fotoğraf altı vb.) tek başına aday sayılmaz.
+MIN_PASSAGE_LENGTH = 80
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def estimate_tokens(text):
+    """LLM token sayısının kaba tahmini (~4 karakter/token), ölçüm katmanıyla aynı kural."""
+    return len(text) // 4
+
+
+def split_passages(text):
+    """Makale metnini paragraflara böler; çok kısa parçalar bir sonrakiyle birleştirilir."""
+    passages = []
+    buffer = ""
+    for paragraph in PARAGRAPH_SPLIT_PATTERN.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        buffer = f"{buffer} {paragraph}".strip()
+        if len(buffer) >= MIN_PASSAGE_LENGTH:
+            passages.append(buffer)
+            buffer = ""
+    if buffer:
+        passages.append(buffer)
+    return passages
+
+
+class BM25:
+    """Pasajları sorgu terimlerine göre Okapi BM25 ile puanlar."""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_counts = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(counts.values()) for counts in self.term_counts]
+        self.average_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        document_frequency = Counter(term for counts in self.term_counts for term in counts)
+        total = len(documents)
+        self.idf = {
+            term: math.log(1 + (total - frequency + 0.5) / (frequency + 0.5))
+            for term, frequency in document_frequency.items()
+        }
+
+    def score(self, index, query_terms):
+        counts = self.term_counts[index]
+        length_norm = 1 - self.b + self.b * self.lengths[index] / (self.average_length or 1)
+        total = 0.0
+        for term in query_terms:
+            frequency = counts.get(term, 0)
+            if frequency:
+                total += self.idf[term] * frequency * (self.k1 + 1) / (frequency + self.k1 * length_norm)
+        return total
+
+
+def query_terms_from_keywords(*keyword_lists):
+    """Anahtar kelime listelerini ("car manufacturing" gibi çok kelimeli olanlar dahil) terim kümesine çevirir."""
+    return {term for keywords in keyword_lists for keyword in keywords for term in tokenize(keyword)}
+
+
+def pack_articles(articles, query_terms, token_budget):
+    """
+    Makaleleri paragraflara böler, her paragrafı sorgu terimlerine göre BM25 ile puanlar
+    ve en yüksek puanlı paragrafları `token_budget` dolana kadar seçer. Sorguyla hiç
+    eşleşmeyen paragraflar alınmaz. Seçilen paragraflar makale bazında özgün sıralarıyla
+    birleştirilir; makaleler en iyi paragraflarının puanına göre sıralanır.
+    """
+    passages = [
+        (article_index, passage_index, passage)
+        for article_index, text in enumerate(articles)
+        for passage_index, passage in enumerate(split_passages(text))
+    ]
+    if not passages:
+        return []
+
+    bm25 = BM25([passage for _, _, passage in passages])
+    scored = sorted(
+        ((bm25.score(i, query_terms), i) for i in range(len(passages))),
+        key=lambda item: (-item[0], item[1]),
+    )
+
+    selected = {}
+    best_scores = {}
+    used_tokens = 0
+    for score, i in scored:
+        if score <= 0:
+            break
+        article_index, passage_index, passage = passages[i]
+        cost = estimate_tokens(passage)
+        if used_tokens + cost > token_budget:
+            continue
+        used_tokens += cost
+        selected.setdefault(article_index, []).append((passage_index, passage))
+        best_scores.setdefault(article_index, score)
+
+    ordered_articles = sorted(selected, key=lambda article_index: -best_scores[article_index])
+    return ["\n\n".join(passage for _, passage in sorted(selected[a])) for a in ordered_articles]
+
+
+def truncate_to_budget(articles, token_budget):
+    """
+    Makaleleri sırayla, toplam tahmini token sayısı `token_budget`'ı aşmayacak şekilde
+    alır; bütçeye sığmayan son makale kelime sınırından kesilir, kalanlar atılır.
+    """
+    truncated = []
+    remaining = token_budget
+    for text in articles:
+        if remaining <= 0:
+            break
+        if estimate_tokens(text) > remaining:
+            cut = text[:remaining * 4]
+            text = cut.rsplit(None, 1)[0] if " " in cut.strip() else cut
+        truncated.append(text)
+        remaining -= estimate_tokens(text)
+    return [text for text in truncated if text.strip()]
@@ -0,0 +1,52 @@
+import json
+import os
+
+DEFAULT_WATERMARK_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "news_watermark.json"
+)
+
+
+class NewsWatermark:
+    """
+    Artımlı haber alımı için kalıcı filigran: en son işlenen `publishedAt` değeri ve
+    işlenmiş URL'ler (url -> publishedAt). Filigran yalnızca bir çalıştırmada tüm
+    adaylar değerlendirildiyse ilerletilir; aksi halde eski adaylar sonraki
+    çalıştırmada işlenmiş URL'ler elenerek tekrar ele alınır.
+    """
+
+    def __init__(self, path=DEFAULT_WATERMARK_PATH):
+        self.path = path
+        self.last_published_at = None
+        self.processed_urls = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.last_published_at = data.get("last_published_at")
+            self.processed_urls = data.get("processed_urls", {})
+
+    def from_date(self, default_from):
+        """NewsAPI `from` parametresi: filigran varsa ve pencereden yeniyse filigran, yoksa varsayılan."""
+        if self.last_published_at and self.last_published_at > default_from:
+            return self.last_published_at
+        return default_from
+
+    def is_processed(self, url):
+        return url in self.processed_urls
+
+    def mark_processed(self, url, published_at):
+        self.processed_urls[url] = published_at or ""
+
+    def advance(self, published_at):
+        if published_at and (not self.last_published_at or published_at > self.last_published_at):
+            self.last_published_at = published_at
+
+    def save(self, oldest_kept):
+        """`oldest_kept` tarihinden eski işlenmiş URL'leri atıp dosyaya yazar."""
+        self.processed_urls = {
+            url: published_at for url, published_at in self.processed_urls.items()
+            if published_at >= oldest_kept
+        }
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"last_published_at": self.last_published_at, "processed_urls": self.processed_urls}, f)
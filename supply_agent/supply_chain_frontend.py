@@ -3,8 +3,18 @@ import subprocess
 import sys
 import json
 import re
+import tempfile
+import threading
 import time
 import os
+import uuid
+from collections import deque
+
+from tools.agent_media import has_frames, request_gif
+
+# Ekranda tutulacak en fazla log satırı ve log görünümünün en sık yenilenme aralığı (saniye).
+LOG_MAX_LINES = 500
+LOG_RENDER_INTERVAL = 0.5
 
 def add_bg_from_url_and_style():
     """
@@ -53,6 +63,27 @@ def clean_ansi_escape_codes(text):
     return ansi_escape.sub('', text)
 
 
+def pump_stdout(stream, log_lines):
+    """Orkestratörün stdout'unu arka planda okuyup sınırlı log tamponuna (ring buffer) ekler."""
+    for line in iter(stream.readline, ''):
+        log_lines.append(clean_ansi_escape_codes(line.rstrip()))
+    stream.close()
+
+
+def read_new_events(path, offset):
+    """Olay dosyasına son okumadan beri eklenen tam satırları ayrıştırır; (olaylar, yeni offset) döndürür."""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        f.seek(offset)
+        while True:
+            line = f.readline()
+            if not line.endswith("\n"):
+                break
+            offset = f.tell()
+            events.append(json.loads(line))
+    return events, offset
+
+
 if st.button('İş Akışını Başlat', type="primary", use_container_width=True):
     
     
@@ -68,123 +99,140 @@ if st.button('İş Akışını Başlat', type="primary", use_container_width=Tru
         
         step1_placeholder = st.empty()
         step2_placeholder = st.empty()
-        step3_placeholder = st.empty()
+        step3_placeholder = st.container()
+        step3_status = step3_placeholder.empty()
+        step3_outputs = step3_placeholder.container()
         step4_placeholder = st.empty()
         step5_placeholder = st.empty()
         step6_placeholder = st.empty()
         final_status_placeholder = st.empty()
-        gif_placeholder = st.empty() 
 
-    full_log = ""
+    def render_event(event, state):
+        """Orkestratörden gelen yapılandırılmış bir olayı ilgili adım alanına yansıtır."""
+        node = event.get("node")
+        payload = event.get("payload") or {}
 
-    try:
-        process = subprocess.Popen(
-            [sys.executable, "main_orchestrator.py"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT, 
-            text=True,
-            encoding='utf-8',
-            bufsize=1 
-        )
-
-        raw_browser_output = ""
-        capturing_browser_output = False
-        
-        
-        for line in iter(process.stdout.readline, ''):
-            clean_line = clean_ansi_escape_codes(line.strip())
-            full_log += clean_line + "\n"
-            log_placeholder.code(full_log, language="log")
-
-            
-            if "Düğüm 1: Haberler Çekiliyor" in clean_line:
+        if event["type"] == "node_start":
+            if node == "news_agent":
                 step1_placeholder.status("Adım 1: Haberler Taranıyor...", state="running")
-            
-            
-            if "Düğüm 2: Risk Analizi Yapılıyor" in clean_line:
-                step1_placeholder.status("Adım 1: Haberler Taranıyor...", state="complete")
+            elif node == "risk_analyst":
                 step2_placeholder.status("Adım 2: Risk Analizi Yapılıyor ve Arama Sorgusu Üretiliyor...", state="running")
-
-            if "Yeni arama sorgusu:" in clean_line:
-                search_prompt = clean_line.split("Yeni arama sorgusu:", 1)[1].strip()
-                with step2_placeholder.container():
-                    st.write("**Adım 2: Risk Analizi**")
-                    st.success("Risk analizi tamamlandı. Web araştırması için aşağıdaki sorgu üretildi:")
-                    st.code(search_prompt, language='text')
-
-            
-            if "Düğüm 3: Web'de Araştırma Yapılıyor" in clean_line:
-                step3_placeholder.status("Adım 3: Alternatif Tedarikçiler İçin Web'de Araştırma Yapılıyor...", state="running")
-                capturing_browser_output = True
-            
-            if "Düğüm 4: Araştırma Sonuçları Ayıklanıyor" in clean_line:
-                capturing_browser_output = False
-                with step3_placeholder.container():
-                     st.write("**Adım 3: Web Araştırması**")
-                     st.success("Web araştırması tamamlandı.")
-                     with st.expander("Browser Agent'ın Ham Çıktısını Görüntüle"):
-                         st.text(raw_browser_output)
-
-            if capturing_browser_output and "Düğüm 3:" not in clean_line:
-                 raw_browser_output += line
-
-            
-            if "Düğüm 4: Araştırma Sonuçları Ayıklanıyor" in clean_line:
-                 step4_placeholder.status("Adım 4: Tedarikçi Bilgileri Ayıklanıyor ve Temizleniyor...", state="running")
-
-            if "Ayıklanan Tedarikçiler" in clean_line:
-                try:
-                    json_str = clean_line.split("JSON):", 1)[1].strip()
-                    suppliers_data = json.loads(json_str)
-                    with step4_placeholder.container():
-                        st.write("**Adım 4: Tedarikçi Bilgilerinin Ayıklanması**")
-                        if suppliers_data:
-                            st.success(f"{len(suppliers_data)} adet geçerli tedarikçi bilgisi (isim ve email) başarıyla ayıklandı.")
-                            st.json(suppliers_data)
-                        else:
-                            st.warning("Araştırma sonucunda geçerli bir tedarikçi bilgisi bulunamadı.")
-                except (json.JSONDecodeError, IndexError) as e:
-                    with step4_placeholder.container():
-                        st.write("**Adım 4: Tedarikçi Bilgilerinin Ayıklanması**")
-                        st.error(f"Tedarikçi verisi ayıklanırken bir hata oluştu: {e}")
-                        st.text(clean_line)
-            
-            
-            if "Veritabanına Kaydediliyor" in clean_line:
+            elif node == "browser_agent":
+                state["browser_running"] += 1
+                step3_status.status(f"Adım 3: Alternatif Tedarikçiler İçin Web'de Araştırma Yapılıyor ({state['browser_running']} araştırma sürüyor)...", state="running")
+            elif node == "parser":
+                step4_placeholder.status("Adım 4: Tedarikçi Bilgileri Ayıklanıyor ve Temizleniyor...", state="running")
+            elif node == "save_to_db":
                 step5_placeholder.status("Adım 5: Tedarikçi Listesi Veritabanına Kaydediliyor...", state="running")
-            
-            if "yeni tedarikçi veritabanına eklendi" in clean_line:
-                with step5_placeholder.container():
-                    st.write("**Adım 5: Veritabanına Kayıt**")
-                    st.success(clean_line)
-
-           
-            if "Düğüm 5: E-posta Agent'ı" in clean_line:
+            elif node == "email_agent":
                 step6_placeholder.status("Adım 6: Bulunan Tedarikçilere İlk Temas E-postaları Gönderiliyor...", state="running")
 
-            if "E-postalar gönderildi ve durumlar güncellendi" in clean_line:
+        elif event["type"] == "node_end":
+            duration = f"{event.get('duration', 0):.1f} sn"
+            if node == "news_agent":
+                step1_placeholder.status(f"Adım 1: Haberler Tarandı ({duration})", state="complete")
+            elif node == "risk_analyst":
+                with step2_placeholder.container():
+                    st.write(f"**Adım 2: Risk Analizi** ({duration})")
+                    st.success("Risk analizi tamamlandı. Web araştırması için aşağıdaki sorgu(lar) üretildi:")
+                    for search_prompt in payload.get("search_prompts", []):
+                        st.code(search_prompt, language='text')
+            elif node == "browser_agent":
+                state["browser_running"] -= 1
+                state["browser_done"] += 1
+                step3_status.status(f"Adım 3: {state['browser_done']} web araştırması tamamlandı", state="running" if state["browser_running"] else "complete")
+                with step3_outputs:
+                    with st.expander(f"Browser Agent'ın Ham Çıktısını Görüntüle ({state['browser_done']}, {duration})"):
+                        st.text("\n\n".join(item["output"] for item in payload.get("browser_outputs", [])))
+            elif node == "parser":
+                suppliers_data = payload.get("suppliers_json", [])
+                with step4_placeholder.container():
+                    st.write(f"**Adım 4: Tedarikçi Bilgilerinin Ayıklanması** ({duration})")
+                    if suppliers_data:
+                        st.success(f"{len(suppliers_data)} adet geçerli tedarikçi bilgisi (isim ve email) başarıyla ayıklandı.")
+                        st.json(suppliers_data)
+                    else:
+                        st.warning("Araştırma sonucunda geçerli bir tedarikçi bilgisi bulunamadı.")
+            elif node == "save_to_db":
+                with step5_placeholder.container():
+                    st.write(f"**Adım 5: Veritabanına Kayıt** ({duration})")
+                    st.success(payload.get("db_status", ""))
+            elif node == "email_agent":
                 with step6_placeholder.container():
-                    st.write("**Adım 6: E-posta Gönderimi**")
-                    st.success("Tedarikçilerle ilk temas başarıyla kuruldu.")
+                    st.write(f"**Adım 6: E-posta Gönderimi** ({duration})")
+                    st.success(payload.get("final_status") or "Tedarikçilerle ilk temas başarıyla kuruldu.")
 
-            
-            if "İş Akışı Başarıyla Tamamlandı" in clean_line:
-                final_status_placeholder.success("🏁 Agentic İş Akışı Başarıyla Tamamlandı!")
+        elif event["type"] == "node_error":
+            st.error(f"{node} düğümünde hata: {event.get('error')}")
+
+        elif event["type"] == "run_end":
+            state["status"] = event.get("status")
+            if state["status"] == "success":
+                final_status_placeholder.success(f"🏁 Agentic İş Akışı Başarıyla Tamamlandı! ({event.get('duration', 0):.1f} sn)")
                 st.balloons()
-                
-        process.wait() 
-        
-        
-        gif_path = "agent_history.gif"
-        if os.path.exists(gif_path):
-            time.sleep(1)
-            with gif_placeholder.container():
-                st.subheader("🤖 Agent Akışının Görsel Özeti")
-                st.image(gif_path)
+            else:
+                final_status_placeholder.error(f"İş akışı bir hata ile sonlandı: {event.get('error')}")
+
+    log_lines = deque(maxlen=LOG_MAX_LINES)
+    events_file = tempfile.NamedTemporaryFile(prefix="orchestrator_events_", suffix=".jsonl", delete=False)
+    events_file.close()
+
+    run_id = uuid.uuid4().hex
+    st.session_state["last_run_id"] = run_id
+    try:
+        process = subprocess.Popen(
+            [sys.executable, "main_orchestrator.py", "--events", events_file.name, "--run-id", run_id],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT, 
+            text=True,
+            encoding='utf-8',
+            bufsize=1 
+        )
+        reader = threading.Thread(target=pump_stdout, args=(process.stdout, log_lines), daemon=True)
+        reader.start()
+
+        run_state = {"browser_running": 0, "browser_done": 0, "status": None}
+        offset = 0
+        last_render = 0.0
+        while True:
+            finished = process.poll() is not None
+            events, offset = read_new_events(events_file.name, offset)
+            for event in events:
+                render_event(event, run_state)
+
+            # Log görünümü her satırda değil, en fazla LOG_RENDER_INTERVAL'da bir yenilenir.
+            now = time.monotonic()
+            if finished or now - last_render >= LOG_RENDER_INTERVAL:
+                log_placeholder.code("\n".join(log_lines), language="log")
+                last_render = now
+
+            if finished:
+                break
+            time.sleep(0.1)
+
+        reader.join(timeout=1)
+        log_placeholder.code("\n".join(log_lines), language="log")
         
-        if process.returncode != 0:
-            final_status_placeholder.error(f"İş akışı bir hata ile sonlandı. Lütfen logları kontrol edin.")
-            st.code(full_log, language="log")
+        if process.returncode != 0 or run_state["status"] != "success":
+            if run_state["status"] is None:
+                final_status_placeholder.error(f"İş akışı bir hata ile sonlandı. Lütfen logları kontrol edin.")
+            st.code("\n".join(log_lines), language="log")
 
     except Exception as e:
         st.error(f"Frontend uygulamasında bir hata oluştu: {e}")
+    finally:
+        os.unlink(events_file.name)
+
+
+# Agent'ın ekran görüntüleri çalıştırma sırasında yalnızca kare olarak saklanır;
+# GIF, kullanıcı istediğinde arka planda bu çalıştırma için üretilir.
+last_run_id = st.session_state.get("last_run_id")
+if last_run_id and has_frames(last_run_id):
+    st.subheader("🤖 Agent Akışının Görsel Özeti")
+    if st.button("Görsel özeti oluştur", use_container_width=True):
+        with st.spinner("GIF hazırlanıyor..."):
+            gif_path = request_gif(last_run_id).result()
+        if gif_path:
+            st.image(gif_path)
+        else:
+            st.warning("GIF oluşturulamadı (Pillow kurulu olmayabilir).")
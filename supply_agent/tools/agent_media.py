@@ -0,0 +1,135 @@
+"""
+Browser agent ekran görüntüleri: araştırma sırasında yalnızca sıkıştırılmış kareler
+(.cache/frames/<run_id>/<görev>/NNN.jpg) yazılır; GIF, arayüz istediğinde arka plandaki
+tek bir iş parçacığında üretilir ve run id başına ayrı dosyaya kaydedilir. Yeni bir
+çalıştırmanın ilk kareleri yazılırken eski çalıştırma klasörleri (TTL'i dolan veya en
+yeni AGENT_FRAMES_MAX_RUNS dışında kalanlar) silinir.
+"""
+import base64
+import glob
+import hashlib
+import io
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    # Pillow yoksa kareler PNG olarak saklanır, GIF üretilemez.
+    Image = None
+
+FRAMES_DIR = os.getenv(
+    "AGENT_FRAMES_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "frames")
+)
+FRAME_MAX_WIDTH = int(os.getenv("AGENT_FRAME_MAX_WIDTH", "960"))
+FRAME_JPEG_QUALITY = int(os.getenv("AGENT_FRAME_JPEG_QUALITY", "60"))
+# Saklanacak en fazla çalıştırma klasörü ve bir klasörün en uzun saklanma süresi.
+AGENT_FRAMES_MAX_RUNS = int(os.getenv("AGENT_FRAMES_MAX_RUNS", "20"))
+AGENT_FRAMES_TTL = float(os.getenv("AGENT_FRAMES_TTL", str(3 * 24 * 3600)))
+GIF_FRAME_DURATION_MS = 1000
+GIF_NAME = "agent_history.gif"
+
+_encoder = ThreadPoolExecutor(max_workers=1)
+_pending = {}
+_pending_lock = threading.Lock()
+
+
+def frames_dir_for(run_id, search_prompt, root=FRAMES_DIR):
+    """Bir çalıştırmadaki tek bir araştırma görevinin karelerinin yazılacağı klasör."""
+    task_key = hashlib.sha1(search_prompt.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(root, run_id or "adhoc", task_key)
+
+
+def save_frames(screenshots, directory):
+    """
+    base64 ekran görüntülerini küçültülmüş JPEG kareler olarak yazar (Pillow yoksa PNG olarak).
+    Boş (None) girdiler atlanır. Yazılan kare sayısını döndürür.
+    """
+    run_dir = os.path.dirname(os.path.abspath(directory))
+    if not os.path.isdir(run_dir):
+        prune_runs(os.path.dirname(run_dir))
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for screenshot in screenshots or []:
+        if not screenshot:
+            continue
+        data = base64.b64decode(screenshot)
+        if Image is None:
+            path = os.path.join(directory, f"{count:03d}.png")
+            with open(path, "wb") as f:
+                f.write(data)
+        else:
+            image = Image.open(io.BytesIO(data)).convert("RGB")
+            if image.width > FRAME_MAX_WIDTH:
+                image = image.resize((FRAME_MAX_WIDTH, image.height * FRAME_MAX_WIDTH // image.width))
+            image.save(os.path.join(directory, f"{count:03d}.jpg"), "JPEG", quality=FRAME_JPEG_QUALITY)
+        count += 1
+    return count
+
+
+def prune_runs(root=FRAMES_DIR, max_runs=AGENT_FRAMES_MAX_RUNS, ttl_seconds=AGENT_FRAMES_TTL):
+    """
+    TTL'i dolan ve en yeni `max_runs` çalıştırmanın dışında kalan run klasörlerini
+    (kareler ve GIF) siler; GIF'i hâlâ üretilen çalıştırmalara dokunulmaz.
+    Silinen klasör sayısını döndürür.
+    """
+    if not os.path.isdir(root):
+        return 0
+    runs = sorted(
+        (entry for entry in os.scandir(root) if entry.is_dir()),
+        key=lambda entry: entry.stat().st_mtime, reverse=True,
+    )
+    now = time.time()
+    with _pending_lock:
+        busy = {run_id for run_id, future in _pending.items() if not future.done()}
+    removed = 0
+    for position, entry in enumerate(runs):
+        if entry.name in busy:
+            continue
+        if position >= max_runs or now - entry.stat().st_mtime > ttl_seconds:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            with _pending_lock:
+                _pending.pop(entry.name, None)
+            removed += 1
+    return removed
+
+
+def gif_path(run_id, root=FRAMES_DIR):
+    return os.path.join(root, run_id, GIF_NAME)
+
+
+def has_frames(run_id, root=FRAMES_DIR):
+    return bool(glob.glob(os.path.join(root, run_id, "*", "*.*")))
+
+
+def _encode_gif(run_id, root):
+    path = gif_path(run_id, root)
+    if os.path.exists(path):
+        return path
+    frame_paths = sorted(glob.glob(os.path.join(root, run_id, "*", "*.jpg")) + glob.glob(os.path.join(root, run_id, "*", "*.png")))
+    if Image is None or not frame_paths:
+        return None
+    frames = [Image.open(frame_path).convert("RGB") for frame_path in frame_paths]
+    frames[0].save(
+        path + ".tmp", format="GIF", save_all=True, append_images=frames[1:],
+        duration=GIF_FRAME_DURATION_MS, loop=0,
+    )
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def request_gif(run_id, root=FRAMES_DIR):
+    """
+    Çalıştırmanın GIF yolunu döndüren bir Future verir; GIF arka planda ve yalnızca bir kez
+    üretilir, aynı run için süren bir üretim varsa o Future paylaşılır. Kare yoksa veya
+    Pillow kurulu değilse sonuç None olur.
+    """
+    with _pending_lock:
+        future = _pending.get(run_id)
+        if future is None or (future.done() and (future.exception() or future.result() is None)):
+            future = _encoder.submit(_encode_gif, run_id, root)
+            _pending[run_id] = future
+        return future
@@ -1,30 +1,124 @@
-import subprocess
-import sys
+import asyncio
 import os
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client
+from typing import Optional, TypedDict
 
-def run_browser_agent(search_prompt: str):
+from tools.execution import INPROCESS, SUBPROCESS, get_execution_mode, run_script
+from tools.agent_media import frames_dir_for
+from tools.llm_registry import is_fake_backend
+from tools.metrics import current_run
+from tools.research_cache import cached_research, is_successful_result
+
+# LLM_BACKEND=fake iken tarayıcı açmadan döndürülen örnek araştırma çıktısı.
+FAKE_BROWSER_OUTPUT = (
+    "{company_name: Nordic Steel AB, email: sales@nordicsteel.example.com}\n"
+    "{company_name: Rhein Metall Supply GmbH, email: info@rheinmetallsupply.example.com}\n"
+    "{company_name: Anatolia Celik A.S., email: export@anatoliacelik.example.com}"
+)
+BROWSER_FAKE_LATENCY = float(os.getenv("BROWSER_FAKE_LATENCY", "0"))
+# 1 ise araştırma önbelleği okunmaz; sonuçlar yeniden araştırılıp önbelleğe yazılır.
+BROWSER_CACHE_REFRESH = os.getenv("BROWSER_CACHE_REFRESH", "0") == "1"
+# Ayarlanırsa görevler browser_agent/pool.py servisindeki hazır tarayıcı havuzuna gönderilir (örn. 127.0.0.1:6010).
+BROWSER_POOL_ADDRESS = os.getenv("BROWSER_POOL_ADDRESS")
+# Havuz servisindekiyle aynı gizli anahtar; tanımlı değilse havuz kullanılmaz.
+BROWSER_POOL_AUTHKEY = os.getenv("BROWSER_POOL_AUTHKEY")
+BROWSER_POOL_TIMEOUT = float(os.getenv("BROWSER_POOL_TIMEOUT", "600"))
+
+
+class BrowserResult(TypedDict):
+    output: str
+    final_result: Optional[str]
+    is_successful: Optional[bool]
+    mode: str
+
+
+def run_browser_research(search_prompt: str, mode=None, refresh=BROWSER_CACHE_REFRESH) -> Optional[BrowserResult]:
     """
-    browser_use/main.py script'ini bir komut satırı argümanı (search_prompt) ile
-    çalıştırır ve çıktısını döndürür.
+    Browser agent'ı verilen arama sorgusuyla çalıştırır ve yapılandırılmış sonucu döndürür.
+    Aynı malzeme için yakın zamanda yapılmış bir araştırma varsa tarayıcı açılmadan
+    önbellekten döner; `refresh` True ise önbellek atlanır.
+    Subprocess modda yalnızca ham çıktı bilinir; final_result ve is_successful None olur.
     """
-    print("--- Çalıştırılıyor: Browser Agent ---")
-    
-    script_path = os.path.join('browser_agent', 'browser.py')
-    
+    return cached_research(search_prompt, lambda: _run_browser_research(search_prompt, mode), refresh, is_cacheable)
+
+
+def is_cacheable(result):
+    """
+    Yalnızca başarılı olduğu bilinen araştırmalar önbelleğe yazılır. Başarı bilgisi
+    taşımayan subprocess çıktısı, boş değilse istisna olarak kabul edilir.
+    """
+    if result and result.get("mode") == SUBPROCESS:
+        return bool(result.get("output")) and result.get("is_successful") is not False
+    return is_successful_result(result)
+
+
+def submit_to_pool(search_prompt, frames_dir=None, address=BROWSER_POOL_ADDRESS, timeout=BROWSER_POOL_TIMEOUT):
+    """
+    Görevi browser worker havuzuna gönderir ve sonucu bekler. Servise bağlanılamazsa
+    ConnectionError, görev başarısız olursa veya zaman aşımında None döner.
+    """
+    host, port = address.rsplit(":", 1)
     try:
-        result = subprocess.run(
-            [sys.executable, script_path, search_prompt],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        return result.stdout.strip()
-        
-    except subprocess.CalledProcessError as e:
-        print(f"HATA: {script_path} çalıştırılırken bir hata oluştu.")
-        print(f"Hata Detayları:\n{e.stderr}")
+        conn = Client((host, int(port)), authkey=BROWSER_POOL_AUTHKEY.encode("utf-8"))
+    except (OSError, AuthenticationError) as e:
+        raise ConnectionError(f"Browser havuzuna bağlanılamadı ({address}): {e}") from e
+    with conn:
+        conn.send({"task": search_prompt, "frames_dir": frames_dir})
+        if not conn.poll(timeout):
+            print(f"HATA: Browser havuzu {timeout:g} sn içinde yanıt vermedi.")
+            return None
+        response = conn.recv()
+    if not response["ok"]:
+        print(f"HATA: Browser havuzunda görev başarısız oldu: {response['error']}")
         return None
-    except FileNotFoundError:
-        print(f"HATA: {script_path} dosyası bulunamadı.")
+    return response["result"]
+
+
+def _run_browser_research(search_prompt, mode=None):
+    print("--- Çalıştırılıyor: Browser Agent ---")
+    # Ekran görüntüleri run id başına ayrı klasöre yazılır; GIF arayüz isteyince üretilir.
+    frames_dir = frames_dir_for(current_run.get(), search_prompt)
+
+    if is_fake_backend():
+        if BROWSER_FAKE_LATENCY:
+            time.sleep(BROWSER_FAKE_LATENCY)
+        return {"output": FAKE_BROWSER_OUTPUT, "final_result": FAKE_BROWSER_OUTPUT, "is_successful": True, "mode": "fake"}
+
+    if BROWSER_POOL_ADDRESS and not BROWSER_POOL_AUTHKEY:
+        print("UYARI: BROWSER_POOL_AUTHKEY tanımlı değil, browser havuzu kullanılmıyor.")
+    elif BROWSER_POOL_ADDRESS:
+        try:
+            result = submit_to_pool(search_prompt, frames_dir)
+            return dict(result, mode="pool") if result else None
+        except ConnectionError as e:
+            print(f"UYARI: {e}. Tarayıcı bu süreçte başlatılıyor.")
+
+    if get_execution_mode(mode) == INPROCESS:
+        from browser_agent import browser
+        try:
+            history = asyncio.run(browser.run_research(search_prompt, frames_dir=frames_dir))
+        except Exception as e:
+            print(f"HATA: Browser agent çalıştırılırken bir hata oluştu: {e}")
+            return None
+        return {
+            "output": str(history),
+            "final_result": history.final_result(),
+            "is_successful": history.is_successful(),
+            "mode": INPROCESS,
+        }
+
+    script_path = os.path.join('browser_agent', 'browser.py')
+    output = run_script(script_path, [search_prompt, frames_dir])
+    if output is None:
         return None
+    return {"output": output, "final_result": None, "is_successful": None, "mode": SUBPROCESS}
+
+
+def run_browser_agent(search_prompt: str, mode=None, refresh=BROWSER_CACHE_REFRESH):
+    """
+    Browser agent'ı çalıştırır ve ham çıktısını metin olarak döndürür.
+    """
+    result = run_browser_research(search_prompt, mode, refresh)
+    return result["output"] if result else None
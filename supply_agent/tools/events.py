@@ -0,0 +1,59 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+
+_sink = None
+_run_id = None
+_lock = threading.Lock()
+# Aynı sink'e birden fazla çalıştırma yazdığında (scheduler) olayın ait olduğu çalıştırma.
+current_run = contextvars.ContextVar("event_run_id", default=None)
+
+
+def set_event_sink(path, run_id):
+    """Olayların JSON satırları (JSONL) olarak yazılacağı dosyayı ve çalıştırma kimliğini ayarlar."""
+    global _sink, _run_id
+    close_event_sink()
+    _sink = open(path, "a", encoding="utf-8") if path else None
+    _run_id = run_id
+
+
+def close_event_sink():
+    global _sink
+    with _lock:
+        if _sink is not None:
+            _sink.close()
+            _sink = None
+
+
+def emit_event(event_type, **fields):
+    """Tek bir olayı yazar; sink ayarlanmamışsa hiçbir şey yapmaz."""
+    if _sink is None:
+        return
+    event = {"type": event_type, "run_id": current_run.get() or _run_id, "ts": time.time(), **fields}
+    line = json.dumps(event, ensure_ascii=False, default=str)
+    with _lock:
+        if _sink is not None:
+            _sink.write(line + "\n")
+            _sink.flush()
+
+
+def traced_node(node_name, node_fn):
+    """
+    Bir graph düğümünü sarar: başlangıçta node_start, bitişte süre ve çıktı (payload)
+    ile node_end, hata durumunda node_error olayı yayınlar.
+    """
+    @functools.wraps(node_fn)
+    def wrapper(state):
+        emit_event("node_start", node=node_name)
+        start = time.perf_counter()
+        try:
+            result = node_fn(state)
+        except Exception as e:
+            emit_event("node_error", node=node_name, duration=time.perf_counter() - start, error=str(e))
+            raise
+        emit_event("node_end", node=node_name, duration=time.perf_counter() - start, payload=result)
+        return result
+
+    return wrapper
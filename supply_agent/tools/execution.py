@@ -0,0 +1,50 @@
+import os
+import subprocess
+import sys
+import time
+
+from tools.metrics import record
+
+# "inprocess": agent giriş noktaları doğrudan çağrılır (varsayılan).
+# "subprocess": her araç ayrı bir Python yorumlayıcısında çalıştırılır (izolasyon gerektiğinde).
+INPROCESS = "inprocess"
+SUBPROCESS = "subprocess"
+TOOL_EXECUTION_MODE = os.getenv("TOOL_EXECUTION_MODE", INPROCESS)
+
+
+def get_execution_mode(mode=None):
+    """Çağrıya özel mod verilmemişse TOOL_EXECUTION_MODE ortam değişkenini kullanır."""
+    mode = mode or TOOL_EXECUTION_MODE
+    if mode not in (INPROCESS, SUBPROCESS):
+        raise ValueError(f"Geçersiz araç çalıştırma modu: {mode}")
+    return mode
+
+
+def run_script(script_path, args=()):
+    """
+    Script'i ayrı bir yorumlayıcıda çalıştırır ve standart çıktısını döndürür.
+    Hata durumunda None döner.
+    """
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(
+            [sys.executable, script_path, *args],
+            capture_output=True,
+            text=True,
+            check=True,
+            encoding='utf-8'
+        )
+        return result.stdout.strip()
+
+    except subprocess.CalledProcessError as e:
+        print(f"HATA: {script_path} çalıştırılırken bir hata oluştu.")
+        print(f"Hata Detayları:\n{e.stderr}")
+        return None
+    except FileNotFoundError:
+        print(f"HATA: {script_path} dosyası bulunamadı. Dosya yapınızı kontrol edin.")
+        return None
+    finally:
+        # Alt sürecin toplam süresi (yorumlayıcı başlatma + import + script'in kendi işi);
+        # yalnızca başlatma maliyeti değildir, onu benchmarks/startup_time.py ölçer.
+        record("subprocess_run_seconds", time.perf_counter() - start)
+        record("subprocess_count")
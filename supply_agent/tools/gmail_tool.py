@@ -1,30 +1,44 @@
-import subprocess
-import sys
+import importlib
 import os
 
-def run_email_agent():
+from tools.execution import INPROCESS, get_execution_mode, run_script
+from tools.llm_registry import is_fake_backend
+
+
+def send_initial_emails(mode=None):
     """
-    gmail_agent/send_initial_emails.py script'ini çalıştırır ve parser'dan gelen
-    JSON verisini standart input (stdin) üzerinden bu script'e gönderir.
+    gmail_agent/send_initial_emails.py ile veritabanındaki yeni tedarikçilere ilk
+    e-postaları gönderir ve bir gönderim raporu (dict) döndürür.
+    In-process modda modülün main() fonksiyonunun döndürdüğü rapor kullanılır;
+    subprocess modda rapor yalnızca script'in çıktısını içerir.
     """
     print("--- Çalıştırılıyor: Email Agent (İlk Temas) ---")
-    
-    script_path = os.path.join('gmail_agent', 'send_initial_emails.py')
 
-    try:
-        result = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,
-            text=True,
-            check=True,
-            encoding='utf-8'
-        )
-        return result.stdout.strip()
-        
-    except subprocess.CalledProcessError as e:
-        print(f"HATA: {script_path} çalıştırılırken bir hata oluştu.")
-        print(f"Hata Detayları:\n{e.stderr}")
-        return None
-    except FileNotFoundError:
-        print(f"HATA: {script_path} dosyası bulunamadı.")
+    if is_fake_backend():
+        # LLM_BACKEND=fake (benchmark) iken gerçek e-posta gönderilmez.
+        return {"status": "Sahte mod: e-posta gönderilmedi.", "sent": 0}
+
+    if get_execution_mode(mode) == INPROCESS:
+        try:
+            module = importlib.import_module('gmail_agent.send_initial_emails')
+        except ImportError as e:
+            print(f"HATA: gmail_agent.send_initial_emails modülü yüklenemedi: {e}")
+            return None
+        report = module.main()
+        if isinstance(report, dict):
+            return report
+        return {"status": report}
+
+    script_path = os.path.join('gmail_agent', 'send_initial_emails.py')
+    output = run_script(script_path)
+    if output is None:
         return None
+    return {"status": output}
+
+
+def run_email_agent(mode=None):
+    """
+    Email agent'ı çalıştırır ve durum metnini döndürür.
+    """
+    report = send_initial_emails(mode)
+    return report.get("status") if report else None
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from tools.metrics import record
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "llm_responses.sqlite3"
+)
+
+# Önbelleği kullanacak düğümler (virgülle ayrılmış). Boş bırakılırsa önbellek kapalıdır.
+LLM_CACHE_NODES = {
+    node.strip() for node in os.getenv("LLM_CACHE_NODES", "risk_analyst,parser").split(",") if node.strip()
+}
+
+
+class LLMResponseCache:
+    """
+    Model adı + prompt hash'i ile anahtarlanan iki katmanlı LLM yanıt önbelleği.
+    Bellekte bir LRU katmanı, diskte kalıcı bir SQLite katmanı bulunur; her iki
+    katmandaki kayıtlar `ttl_seconds` sonunda geçersiz sayılır.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=24 * 3600, max_memory_entries=256):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._miss_seconds = 0.0
+
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )"""
+            )
+            self.conn.commit()
+        else:
+            self.conn = None
+
+    @staticmethod
+    def make_key(model, prompt):
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return f"{model}:{digest}"
+
+    def get(self, model, prompt):
+        key = self.make_key(model, prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[1] <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+
+            if self.conn:
+                row = self.conn.execute(
+                    "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+        return None
+
+    def put(self, model, prompt, response):
+        key = self.make_key(model, prompt)
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, response, created_at)
+            if self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO llm_responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                    (key, model, response, created_at),
+                )
+                self.conn.commit()
+
+    def _remember(self, key, response, created_at):
+        self._memory[key] = (response, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def complete(self, model, prompt, call, validate=None):
+        """
+        Önbellekte yanıt varsa onu döndürür; yoksa `call()` ile modeli çağırır,
+        yanıtı kaydeder ve döndürür. `call` metin döndüren argümansız bir fonksiyondur.
+        `validate` verilirse yalnızca onu geçen yanıtlar kaydedilir; geçmeyen eski
+        kayıtlar ıska sayılır ve model yeniden çağrılır.
+        """
+        cached = self.get(model, prompt)
+        if cached is not None and not _is_valid(cached, validate):
+            cached = None
+        if cached is not None:
+            record("llm_cache_hits")
+            with self._lock:
+                if self.misses:
+                    self.saved_seconds += self._miss_seconds / self.misses
+            return cached
+
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += elapsed
+        if _is_valid(response, validate):
+            self.put(model, prompt, response)
+        else:
+            print(f"UYARI: {model} yanıtı doğrulanamadı, önbelleğe kaydedilmedi.")
+        return response
+
+    def stats(self):
+        """İsabet oranı ve (ortalama ıska süresine göre) tahmini kazanılan süre."""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
+
+
+def _is_valid(response, validate):
+    """`validate` yoksa her yanıt geçerlidir; doğrulayıcının fırlattığı hata geçersiz sayılır."""
+    if validate is None:
+        return True
+    try:
+        return bool(validate(response))
+    except Exception:
+        return False
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """Süreç genelinde paylaşılan önbelleği döndürür; LLM_CACHE_ENABLED=0 ise None."""
+    global _cache
+    if os.getenv("LLM_CACHE_ENABLED", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+                max_memory_entries=int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256")),
+            )
+        return _cache
+
+
+def cached_completion(node_name, model, prompt, call, validate=None):
+    """
+    Düğüm LLM_CACHE_NODES listesindeyse yanıtı önbellekten verir, değilse doğrudan `call()` çağırır.
+    `validate`, yanıtın çağıran tarafından işlenebilir olduğunu kontrol eden fonksiyondur.
+    """
+    cache = get_llm_cache() if node_name in LLM_CACHE_NODES else None
+    if cache is None:
+        return call()
+    response = cache.complete(model, prompt, call, validate=validate)
+    stats = cache.stats()
+    print(f"LLM önbelleği ({node_name}): isabet oranı {stats['hit_rate']:.0%}, tahmini kazanç {stats['saved_seconds']} sn")
+    return response
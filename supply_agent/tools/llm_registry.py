@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+
+from tools.metrics import record_llm_usage
+
+# "google": gerçek Gemini istemcileri, "fake": ağ erişimi olmadan çalışan yerel sahte model.
+LLM_BACKEND = os.getenv("LLM_BACKEND", "google")
+LLM_DEFAULT_CONCURRENCY = int(os.getenv("LLM_DEFAULT_CONCURRENCY", "4"))
+# Model bazında eşzamanlılık sınırları, örn. '{"gemini-1.5-pro-latest": 2}'
+LLM_CONCURRENCY_LIMITS = json.loads(os.getenv("LLM_CONCURRENCY_LIMITS", "{}"))
+LLM_FAKE_LATENCY = float(os.getenv("LLM_FAKE_LATENCY", "0"))
+
+FAKE_SEARCH_PROMPT = (
+    "Find 3 company name and contact email for suppliers of {material}: "
+    "{{company_name: ..., email: ...}}"
+)
+FAKE_MATERIALS = ["automotive grade steel", "automotive semiconductor chips", "lithium-ion battery cells"]
+FAKE_REPLY = (
+    "Thank you for your message. Could you share your unit price for 10,000 units?\n\n"
+    "Best regards, Ford Otosan Supply Chain Management"
+)
+EMAIL_PATTERN = re.compile(r"[\w\.-]+@[\w\.-]+\.\w{2,}")
+TOP_N_PATTERN = re.compile(r"TOP (\d+) MOST CRITICAL")
+CATEGORIES_PATTERN = re.compile(r"Material categories: (\[.*?\])")
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.content = text
+        self.text = text
+
+
+class FakeChatSession:
+    def __init__(self, model, history=None):
+        self.model = model
+        self.history = list(history or [])
+
+    def send_message(self, message):
+        response = self.model.invoke(message)
+        self.history.append({'role': 'user', 'parts': [message]})
+        self.history.append({'role': 'model', 'parts': [response.text]})
+        return response
+
+
+class FakeChatModel:
+    """
+    Ağ erişimi gerektirmeyen sahte model. Orkestratördeki prompt'ları tanır ve
+    düğümlerin ayrıştırabileceği JSON yanıtları üretir; yanıt gecikmesi
+    LLM_FAKE_LATENCY ile ayarlanır.
+    """
+
+    def __init__(self, model_name, latency=LLM_FAKE_LATENCY):
+        self.model_name = model_name
+        self.latency = latency
+
+    def invoke(self, prompt):
+        if self.latency:
+            time.sleep(self.latency)
+        return FakeResponse(self._respond(prompt))
+
+    def start_chat(self, history=None):
+        return FakeChatSession(self, history)
+
+    def generate_content(self, prompt):
+        return self.invoke(prompt)
+
+    @staticmethod
+    def _respond(prompt):
+        if '"search_prompts"' in prompt and CATEGORIES_PATTERN.search(prompt):
+            categories = json.loads(CATEGORIES_PATTERN.search(prompt).group(1))
+            prompts = [
+                {"category": category, "search_prompt": FAKE_SEARCH_PROMPT.format(material=category)}
+                for category in categories
+            ]
+            return json.dumps({"search_prompts": prompts})
+        if '"search_prompts"' in prompt:
+            match = TOP_N_PATTERN.search(prompt)
+            count = int(match.group(1)) if match else 1
+            prompts = [FAKE_SEARCH_PROMPT.format(material=material) for material in FAKE_MATERIALS[:count]]
+            return json.dumps({"search_prompts": prompts})
+        if '"company_name"' in prompt and "Text:" in prompt:
+            text = prompt.rsplit("Text:", 1)[1]
+            suppliers = []
+            for email in dict.fromkeys(EMAIL_PATTERN.findall(text)):
+                domain = email.split("@", 1)[1].split(".")[0]
+                suppliers.append({"company_name": domain.title(), "email": email, "product_name": ""})
+            return json.dumps(suppliers)
+        return FAKE_REPLY
+
+
+class ModelClient:
+    """Bir model istemcisini ve o modele ait eşzamanlılık sınırını (semaphore) bir arada tutar."""
+
+    def __init__(self, name, client, max_concurrency):
+        self.name = name
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def limit(self):
+        """invoke dışındaki çağrı biçimleri (örn. start_chat) için `with` ile kullanılır."""
+        return self._semaphore
+
+    def invoke(self, prompt):
+        with self._semaphore:
+            response = self.client.invoke(prompt)
+        record_llm_usage(response, prompt)
+        return response
+
+    def limited_async(self):
+        """ainvoke çağrılarını bu modelin semaphore'u ile sınırlayan istemci (browser_use Agent'ı için)."""
+        return AsyncLimitedClient(self)
+
+
+class AsyncLimitedClient:
+    """
+    Async bir istemciyi sarar: ainvoke, modelin semaphore'unda boş yer açılana kadar
+    event loop'u bloklamadan bekler. Diğer tüm öznitelikler sarılan istemciye iletilir.
+    """
+
+    def __init__(self, model_client, poll_seconds=0.05):
+        self._model_client = model_client
+        self._poll_seconds = poll_seconds
+
+    def __getattr__(self, name):
+        return getattr(self._model_client.client, name)
+
+    async def ainvoke(self, *args, **kwargs):
+        semaphore = self._model_client.limit()
+        # Semaphore iş parçacıkları arasında paylaşılır; iptal edilen bir bekleme
+        # yer tutup bırakmamış olmasın diye bloklamadan yoklanır.
+        while not semaphore.acquire(blocking=False):
+            await asyncio.sleep(self._poll_seconds)
+        try:
+            return await self._model_client.client.ainvoke(*args, **kwargs)
+        finally:
+            semaphore.release()
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def is_fake_backend():
+    return LLM_BACKEND == "fake"
+
+
+def _concurrency_for(model_name):
+    return int(LLM_CONCURRENCY_LIMITS.get(model_name, LLM_DEFAULT_CONCURRENCY))
+
+
+def _get_or_create(key, model_name, factory):
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = ModelClient(model_name, factory(), _concurrency_for(model_name))
+            _clients[key] = client
+        return client
+
+
+def get_chat_model(model_name, temperature=0):
+    """
+    Orkestratör düğümleri için langchain ChatGoogleGenerativeAI istemcisini döndürür.
+    İstemci süreç başına bir kez oluşturulur; HTTP bağlantıları çağrılar arasında yeniden kullanılır.
+    """
+    def factory():
+        if is_fake_backend():
+            return FakeChatModel(model_name)
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model=model_name, temperature=temperature)
+
+    return _get_or_create(("langchain", model_name, temperature), model_name, factory)
+
+
+def get_browser_llm(model_name):
+    """
+    browser_use Agent'ı için ChatGoogle istemcisini döndürür. Agent'a `.limited_async()`
+    verilmelidir; `.client` doğrudan kullanılırsa model eşzamanlılık sınırı uygulanmaz.
+    """
+    def factory():
+        from browser_use.llm import ChatGoogle
+        return ChatGoogle(model=model_name)
+
+    return _get_or_create(("browser_use", model_name), model_name, factory)
+
+
+def get_generative_model(model_name, system_instruction=None):
+    """Gmail agent'ı için google.generativeai GenerativeModel istemcisini döndürür."""
+    def factory():
+        if is_fake_backend():
+            return FakeChatModel(model_name)
+        import google.generativeai as genai
+        genai.configure(api_key=os.environ.get('GOOGLE_API_KEY'))
+        return genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+    return _get_or_create(("genai", model_name, system_instruction), model_name, factory)
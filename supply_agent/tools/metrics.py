@@ -0,0 +1,162 @@
+"""
+Düğüm bazında ölçüm katmanı: süre, LLM token sayıları, indirilen bayt, veritabanı
+round trip'leri ve subprocess süreleri her çalıştırma (run) için toplanır; çalıştırma
+sonunda yapılandırılmış JSON olarak, bileşen (orkestratör, gmail agent) bazında
+kümülatif sayaçlar da Prometheus textfile biçiminde dışa aktarılır.
+"""
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+METRICS_DIR = os.getenv(
+    "METRICS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "metrics")
+)
+METRIC_PREFIX = "supply_agent"
+
+# Ölçümün hangi düğüme yazılacağını belirler; iş parçacıklarına contextvars.copy_context ile taşınır.
+current_node = contextvars.ContextVar("current_node", default=None)
+# Ölçümün hangi çalıştırmaya yazılacağını belirler; aynı süreçte üst üste binen
+# çalıştırmalar (scheduler) birbirinin sayaçlarını bozmaz.
+current_run = contextvars.ContextVar("current_run", default=None)
+
+_lock = threading.Lock()
+# Context'i taşınmamış iş parçacıkları için son başlatılan çalıştırma.
+_run_id = None
+_runs = {}
+# Kümülatif toplamlara eklenmiş çalıştırmalar; aynı run iki kez dışa aktarılırsa tekrar sayılmaz.
+_exported_runs = set()
+
+
+def _active_run(run_id=None):
+    return run_id or current_run.get() or _run_id
+
+
+def start_run(run_id):
+    """Yeni bir çalıştırma için sayaçları sıfırlar ve çalıştırmayı mevcut context'e bağlar."""
+    global _run_id
+    current_run.set(run_id)
+    with _lock:
+        _run_id = run_id
+        _runs[run_id] = (time.time(), defaultdict(float))
+
+
+def discard_run(run_id):
+    """Dışa aktarılmış bir çalıştırmanın sayaçlarını bellekten siler (uzun süre çalışan süreçler için)."""
+    with _lock:
+        _runs.pop(run_id, None)
+        _exported_runs.discard(run_id)
+
+
+def record(metric, value=1, node=None):
+    """`metric` değerini verilen (ya da o anda çalışan) düğüm için artırır."""
+    node = node or current_node.get() or "unknown"
+    run_id = _active_run()
+    with _lock:
+        if run_id not in _runs:
+            _runs[run_id] = (time.time(), defaultdict(float))
+        _runs[run_id][1][(node, metric)] += value
+
+
+def snapshot(run_id=None):
+    """Çalıştırmanın (varsayılan: mevcut) ölçümlerini {düğüm: {metrik: değer}} olarak döndürür."""
+    run_id = _active_run(run_id)
+    with _lock:
+        started_at, values = _runs.get(run_id, (None, {}))
+        nodes = defaultdict(dict)
+        for (node, metric), value in values.items():
+            nodes[node][metric] = value
+        return {"run_id": run_id, "started_at": started_at, "nodes": dict(nodes)}
+
+
+def instrument_node(node_name, node_fn):
+    """Düğümü sarar: çalıştığı süre boyunca current_node'u ayarlar ve süre/çağrı sayısını kaydeder."""
+    @functools.wraps(node_fn)
+    def wrapper(*args, **kwargs):
+        token = current_node.set(node_name)
+        start = time.perf_counter()
+        try:
+            return node_fn(*args, **kwargs)
+        finally:
+            record("wall_seconds", time.perf_counter() - start, node_name)
+            record("invocations", 1, node_name)
+            current_node.reset(token)
+
+    return wrapper
+
+
+def record_llm_usage(response, prompt_text=None):
+    """
+    LLM yanıtındaki token kullanımını kaydeder. langchain (usage_metadata sözlüğü) ve
+    google.generativeai (usage_metadata nesnesi) biçimlerini tanır; ikisi de yoksa
+    metin uzunluğundan (~4 karakter/token) tahmin eder.
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        prompt_tokens, completion_tokens = usage.get("input_tokens", 0), usage.get("output_tokens", 0)
+    elif usage is not None:
+        prompt_tokens = getattr(usage, "prompt_token_count", 0)
+        completion_tokens = getattr(usage, "candidates_token_count", 0)
+    else:
+        text = getattr(response, "content", None) or getattr(response, "text", "") or ""
+        prompt_tokens = len(prompt_text or "") // 4
+        completion_tokens = len(text if isinstance(text, str) else " ".join(text)) // 4
+    record("llm_calls")
+    record("llm_prompt_tokens", prompt_tokens)
+    record("llm_completion_tokens", completion_tokens)
+
+
+def _load_totals(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return {(entry["node"], entry["metric"]): entry["value"] for entry in json.load(f)}
+
+
+def _write_atomic(path, text):
+    # Yarım yazılmış dosyanın toplanmaması için önce geçici dosyaya yazılır.
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(path + ".tmp", path)
+
+
+def export_run(directory=METRICS_DIR, run_id=None, component="orchestrator"):
+    """
+    Çalıştırmanın ölçümlerini <run_id>.json dosyasına yazar ve değerlerini bileşenin
+    kümülatif toplamlarına ekler. Toplamlar <component>.totals.json'da saklanır ve
+    <component>.prom (Prometheus textfile) dosyasına run_id etiketi olmadan, sayaç
+    olarak yazılır; böylece etiket sayısı çalıştırma sayısıyla büyümez.
+    """
+    data = snapshot(run_id)
+    os.makedirs(directory, exist_ok=True)
+    run_id = data["run_id"] or "adhoc"
+    json_path = os.path.join(directory, f"{run_id}.json")
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+    totals_path = os.path.join(directory, f"{component}.totals.json")
+    prom_path = os.path.join(directory, f"{component}.prom")
+    with _lock:
+        totals = _load_totals(totals_path)
+        if run_id not in _exported_runs:
+            _exported_runs.add(run_id)
+            for node, node_metrics in data["nodes"].items():
+                for metric, value in node_metrics.items():
+                    totals[(node, metric)] = totals.get((node, metric), 0) + value
+        _write_atomic(totals_path, json.dumps(
+            [{"node": node, "metric": metric, "value": value} for (node, metric), value in sorted(totals.items())],
+            indent=2,
+        ))
+
+    lines = []
+    for metric in sorted({metric for _, metric in totals}):
+        name = f"{METRIC_PREFIX}_{metric}_total"
+        lines.append(f"# TYPE {name} counter")
+        for (node, node_metric), value in sorted(totals.items()):
+            if node_metric == metric:
+                lines.append(f'{name}{{component="{component}",node="{node}"}} {value}')
+    _write_atomic(prom_path, "\n".join(lines) + "\n")
+    return json_path, prom_path
@@ -0,0 +1,130 @@
+import atexit
+import os
+import threading
+
+from pymongo import ASCENDING, MongoClient, UpdateOne, monitoring
+
+from tools.metrics import record
+
+MAILING_LIST_COLLECTION = "mailing_list"
+
+_client = None
+_indexed_databases = set()
+_lock = threading.Lock()
+
+
+class DbRoundTripListener(monitoring.CommandListener):
+    """Her veritabanı komutunu, o anda çalışan düğüm adına bir round trip olarak sayar."""
+
+    def started(self, event):
+        record("db_round_trips")
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        record("db_errors")
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def get_mongo_client(mongo_uri=None):
+    """
+    Süreç genelinde paylaşılan MongoClient'ı döndürür. MongoClient kendi bağlantı
+    havuzunu yönetir; havuz boyutu MONGO_MAX_POOL_SIZE ile ayarlanır.
+    """
+    global _client
+    with _lock:
+        if _client is None:
+            mongo_uri = mongo_uri or os.getenv("MONGO_URI")
+            if not mongo_uri:
+                raise ValueError("MONGO_URI ortam değişkeni .env dosyasında bulunamadı.")
+            _client = MongoClient(
+                mongo_uri,
+                maxPoolSize=int(os.getenv("MONGO_MAX_POOL_SIZE", "20")),
+                event_listeners=[DbRoundTripListener()],
+            )
+        return _client
+
+
+def set_mongo_client(client):
+    """Paylaşılan istemciyi dışarıdan verir (örn. benchmark'taki bellek içi MongoDB)."""
+    global _client
+    with _lock:
+        _client = client
+        _indexed_databases.clear()
+
+
+def backfill_normalized_emails(collection):
+    """
+    email_normalized alanı olmayan eski kayıtlara bu alanı ekler; böylece upsert'ler onları
+    bulur ve daha önce iletişime geçilmiş tedarikçiler yeniden 'pending' olarak eklenmez.
+    Aynı email'e sahip birden fazla eski kayıt varsa alan yalnızca birine (tercihen durumu
+    'pending' olmayana) yazılır; diğerleri unique index'e takılmasın diye olduğu gibi kalır.
+    """
+    legacy = collection.find(
+        {"email_normalized": {"$exists": False}, "email": {"$exists": True}},
+        {"_id": 1, "email": 1, "status": 1},
+    )
+    existing = {
+        doc["email_normalized"]
+        for doc in collection.find({"email_normalized": {"$exists": True}}, {"email_normalized": 1})
+    }
+    chosen = {}
+    for doc in legacy:
+        if not isinstance(doc.get("email"), str) or not doc["email"].strip():
+            continue
+        email_normalized = normalize_email(doc["email"])
+        if email_normalized in existing:
+            continue
+        current = chosen.get(email_normalized)
+        if current is None or (current.get("status") == "pending" and doc.get("status") != "pending"):
+            chosen[email_normalized] = doc
+    if chosen:
+        collection.bulk_write(
+            [UpdateOne({"_id": doc["_id"]}, {"$set": {"email_normalized": key}}) for key, doc in chosen.items()],
+            ordered=False,
+        )
+        print(f"{len(chosen)} eski mailing_list kaydına email_normalized alanı eklendi.")
+
+
+def ensure_indexes(db):
+    """
+    mailing_list için normalize email üzerinde unique ve status üzerinde index oluşturur.
+    Index'ten önce eski kayıtlar backfill_normalized_emails ile tamamlanır.
+    """
+    collection = db[MAILING_LIST_COLLECTION]
+    backfill_normalized_emails(collection)
+    # Aynı email'e sahip eski kopyalarda email_normalized alanı olmadığı için index kısmi tutulur.
+    collection.create_index(
+        [("email_normalized", ASCENDING)],
+        unique=True,
+        name="email_normalized_unique",
+        partialFilterExpression={"email_normalized": {"$exists": True}},
+    )
+    collection.create_index([("status", ASCENDING)], name="status")
+
+
+def get_database(db_name=None, mongo_uri=None):
+    """Paylaşılan istemciden veritabanını döndürür; index'ler süreç başına bir kez oluşturulur."""
+    db_name = db_name or os.getenv("DB_NAME", "ai_agent_db")
+    db = get_mongo_client(mongo_uri)[db_name]
+    with _lock:
+        if db_name not in _indexed_databases:
+            ensure_indexes(db)
+            _indexed_databases.add(db_name)
+    return db
+
+
+def close_mongo_client():
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+            _indexed_databases.clear()
+
+
+atexit.register(close_mongo_client)
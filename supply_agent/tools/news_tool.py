@@ -1,34 +1,35 @@
-import subprocess
-import sys
 import os
 
-def run_news_agent():
+from tools.execution import INPROCESS, get_execution_mode, run_script
+
+ARTICLE_SEPARATOR = "\n\n--- ARTICLE SEPARATOR ---\n\n"
+
+
+def get_news_articles(mode=None):
     """
-    news_api/main.py script'ini çalıştırır ve standart çıktısını (stdout) döndürür.
-    Bu, LangGraph'ın news_agent'ı bir araç olarak kullanmasını sağlar.
+    news_agent'ı çalıştırır ve geçerli makale metinlerini liste olarak döndürür.
+    In-process modda newsapi.fetch_articles doğrudan çağrılır; subprocess modda
+    newsagent/newsapi.py ayrı bir yorumlayıcıda çalıştırılıp çıktısı ayrıştırılır.
+    Hata durumunda None, hiç makale yoksa boş liste döner.
     """
     print("--- Çalıştırılıyor: News Agent ---")
-    
-    
+
+    if get_execution_mode(mode) == INPROCESS:
+        from newsagent import newsapi
+        return newsapi.fetch_articles()
+
     script_path = os.path.join('newsagent', 'newsapi.py')
-    
-    try:
-        
-        result = subprocess.run(
-            [sys.executable, script_path],
-            capture_output=True,  
-            text=True,            
-            check=True,           
-            encoding='utf-8'
-        )
-        return result.stdout.strip()
-        
-    except subprocess.CalledProcessError as e:
-        
-        print(f"HATA: {script_path} çalıştırılırken bir hata oluştu.")
-        print(f"Hata Detayları:\n{e.stderr}")
+    output = run_script(script_path)
+    if output is None:
         return None
-    except FileNotFoundError:
-        
-        print(f"HATA: {script_path} dosyası bulunamadı. Dosya yapınızı kontrol edin.")
-        return None
\ No newline at end of file
+    return [text for text in output.split(ARTICLE_SEPARATOR) if text.strip()]
+
+
+def run_news_agent(mode=None):
+    """
+    Makaleleri '--- ARTICLE SEPARATOR ---' ile birleştirilmiş tek bir metin olarak döndürür.
+    Bu, LangGraph'ın news_agent'ı bir araç olarak kullanmasını sağlar.
+    Hata durumunda None, hiç makale yoksa boş metin döner.
+    """
+    articles = get_news_articles(mode)
+    return ARTICLE_SEPARATOR.join(articles) if articles is not None else None
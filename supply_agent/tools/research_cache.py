@@ -0,0 +1,160 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from tools.metrics import record
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "browser_research.sqlite3"
+)
+
+# Risk analistinin ürettiği "... suppliers of <material/service>: {company_name: ..." kalıbı.
+MATERIAL_PATTERN = re.compile(r"suppliers of\s+(.+?)\s*(?::|\{|$)", re.IGNORECASE | re.DOTALL)
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Malzemeyi değiştirmeyen, sorgudan sorguya değişebilen kelimeler.
+FILLER_WORDS = {"a", "an", "the", "and", "or", "for", "of", "alternative", "potential", "new", "reliable"}
+
+
+def extract_material(search_prompt):
+    """Arama sorgusundaki malzeme/hizmet adını olduğu gibi döndürür; kalıp bulunamazsa boş metin."""
+    match = MATERIAL_PATTERN.search(search_prompt)
+    return match.group(1).strip() if match else ""
+
+
+def normalize_material(search_prompt):
+    """
+    Arama sorgusundan malzeme/hizmet adını çıkarıp normalize eder: küçük harf, noktalama
+    ve dolgu kelimeleri atılır, basit çoğul ekleri kaldırılır ve kelimeler sıralanır.
+    "Automotive-grade steel" ile "automotive grade steels" aynı anahtarı üretir.
+    Kalıp bulunamazsa sorgunun tamamı normalize edilir.
+    """
+    text = (extract_material(search_prompt) or search_prompt).lower()
+    words = set()
+    for word in WORD_PATTERN.findall(text):
+        if word in FILLER_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        words.add(word)
+    return " ".join(sorted(words))
+
+
+class ResearchCache:
+    """
+    Browser araştırma sonuçlarını normalize malzeme anahtarıyla SQLite'ta saklar.
+    Kayıtlar `ttl_seconds` sonunda geçersiz sayılır; yalnızca başarılı sonuçlar kaydedilir.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=12 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS research_results (
+                material TEXT PRIMARY KEY,
+                search_prompt TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )"""
+        )
+        self.conn.commit()
+
+    def get(self, search_prompt, newer_than=0.0):
+        """TTL içindeki kaydı döndürür; `newer_than` verilirse yalnızca o andan sonra yazılmış kayıt kabul edilir."""
+        material = normalize_material(search_prompt)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT result, created_at FROM research_results WHERE material = ?", (material,)
+            ).fetchone()
+        if row and row[1] >= newer_than and time.time() - row[1] <= self.ttl_seconds:
+            return json.loads(row[0])
+        return None
+
+    def put(self, search_prompt, result):
+        material = normalize_material(search_prompt)
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO research_results (material, search_prompt, result, created_at) VALUES (?, ?, ?, ?)",
+                (material, search_prompt, json.dumps(result), time.time()),
+            )
+            self.conn.commit()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+# Süren araştırmalar: normalize malzeme -> [kilit, bekleyen sayısı].
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def get_research_cache():
+    """Süreç genelinde paylaşılan önbelleği döndürür; BROWSER_CACHE_ENABLED=0 ise None."""
+    global _cache
+    if os.getenv("BROWSER_CACHE_ENABLED", "1") == "0":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResearchCache(
+                path=os.getenv("BROWSER_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=float(os.getenv("BROWSER_CACHE_TTL", str(12 * 3600))),
+            )
+        return _cache
+
+
+def is_successful_result(result):
+    return bool(result and result.get("output") and result.get("is_successful") is True)
+
+
+def cached_research(search_prompt, research, refresh=False, cacheable=is_successful_result):
+    """
+    Aynı malzeme için TTL içinde bir sonuç varsa tarayıcı açmadan onu döndürür; yoksa
+    (veya `refresh` True ise) `research()` ile araştırmayı yapar ve `cacheable(result)`
+    doğruysa sonucu kaydeder. Varsayılan olarak yalnızca başarılı sonuçlar kaydedilir.
+    Aynı malzeme için aynı anda yalnızca bir araştırma yürütülür; diğer çağrılar onun
+    bitmesini bekleyip sonucunu önbellekten alır (`refresh` ile bekleyenler de yalnızca
+    beklemeye başladıktan sonra yazılmış sonucu kabul eder).
+    """
+    cache = get_research_cache()
+    if cache is None:
+        return research()
+    material = normalize_material(search_prompt)
+    if not refresh:
+        cached = cache.get(search_prompt)
+        if cached is not None:
+            record("browser_cache_hits")
+            print(f"Browser araştırması önbellekten alındı: '{material}'")
+            return cached
+
+    requested_at = time.time()
+    with _inflight_lock:
+        entry = _inflight.setdefault(material, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        waited = not entry[0].acquire(blocking=False)
+        if waited:
+            print(f"'{material}' için süren bir araştırma var, sonucu bekleniyor...")
+            record("browser_inflight_waits")
+            entry[0].acquire()
+        try:
+            if waited:
+                cached = cache.get(search_prompt, newer_than=requested_at if refresh else 0.0)
+                if cached is not None:
+                    record("browser_cache_hits")
+                    print(f"Browser araştırması önbellekten alındı: '{material}'")
+                    return cached
+            result = research()
+            if cacheable(result):
+                cache.put(search_prompt, result)
+            return result
+        finally:
+            entry[0].release()
+    finally:
+        with _inflight_lock:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del _inflight[material]
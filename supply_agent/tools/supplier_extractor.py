@@ -0,0 +1,100 @@
+"""
+Parser LLM'inden önce çalışan kural tabanlı tedarikçi çıkarıcı. Browser çıktısındaki
+{company_name: ..., email: ...} kalıpları ve "Şirket Adı - email" satırları önceden
+derlenmiş regex'lerle okunur; satır içindeki şirket adı email alan adıyla eşleşiyorsa
+kabul edilir. Güvenle çözülemeyen email'ler içeren metinler LLM'e bırakılır.
+"""
+import re
+
+EMAIL_VALIDATION_PATTERN = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w{2,}$")
+EMAIL_PATTERN = re.compile(r"[\w\.+-]+@[\w-]+(?:\.[\w-]+)*\.[A-Za-z]{2,}")
+# {company_name: X, email: Y}, "company_name": "X", "email": "Y" ve benzeri yazımlar.
+PAIR_PATTERN = re.compile(
+    r"""["']?company[_ ]name["']?\s*[:=]\s*["']?(?P<company>[^,{}\n"']+?)["']?\s*[,;]\s*"""
+    r"""["']?e-?mail["']?\s*[:=]\s*["']?(?P<email>[\w\.+-]+@[\w\.-]+\.\w{2,})""",
+    re.IGNORECASE,
+)
+# Email'den önceki "- Email:", "contact:" gibi ayraç ve etiketler.
+TRAILING_LABEL_PATTERN = re.compile(r"(?:[\s\-–:|,(<\[]|\b(?:e-?mail|mail|contact)\b)+$", re.IGNORECASE)
+# Satır sonundaki büyük harfle başlayan kelime dizisi (şirket adı adayı).
+COMPANY_BEFORE_EMAIL_PATTERN = re.compile(r"([A-Z][\w&.'-]*(?:\s+(?:[A-Z&][\w&.'-]*|of|and|de|und))*)$")
+LABEL_WORDS = {"email", "e-mail", "mail", "contact", "company", "name", "supplier"}
+LEGAL_SUFFIXES = {
+    "ab", "ag", "as", "a.s", "bv", "co", "corp", "corporation", "gmbh", "inc", "kg", "limited",
+    "llc", "ltd", "nv", "oy", "plc", "sa", "sas", "spa", "srl", "company",
+}
+FREEMAIL_DOMAINS = {"gmail", "hotmail", "outlook", "yahoo", "yandex", "icloud", "protonmail", "mail"}
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+SOURCE_RULES = "rules"
+SOURCE_LLM = "llm"
+
+
+def is_valid_email(email: str) -> bool:
+    """Basit bir regex ile email formatını doğrular."""
+    return EMAIL_VALIDATION_PATTERN.match(email) is not None
+
+
+def domain_labels(email):
+    """Email alan adının TLD dışındaki etiketleri; örn. sales@eu.nordicsteel.com -> ['eu', 'nordicsteel']."""
+    return email.rsplit("@", 1)[1].lower().split(".")[:-1]
+
+
+def company_matches_domain(company, email):
+    """
+    Şirket adı ile email alan adı uyumlu mu: hukuki ekler atılmış adın birleşik hali,
+    baş harfleri veya en az 4 harfli bir kelimesi alan adı etiketlerinden birinde geçiyorsa.
+    """
+    labels = [label for label in domain_labels(email) if label not in FREEMAIL_DOMAINS]
+    words = [word for word in WORD_PATTERN.findall(company.lower()) if word not in LEGAL_SUFFIXES]
+    if not labels or not words:
+        return False
+    compact = "".join(words)
+    initials = "".join(word[0] for word in words)
+    for label in labels:
+        label = label.replace("-", "")
+        if compact in label or (len(label) >= 4 and label in compact):
+            return True
+        if len(initials) >= 2 and label.startswith(initials):
+            return True
+        if any(len(word) >= 4 and word in label for word in words):
+            return True
+    return False
+
+
+def _company_before(line, email_start):
+    """Satırda email'den önceki kısımdan etiket kelimelerini atarak şirket adı adayını çıkarır."""
+    match = COMPANY_BEFORE_EMAIL_PATTERN.search(TRAILING_LABEL_PATTERN.sub("", line[:email_start]))
+    if not match:
+        return None
+    words = match.group(1).split()
+    while words and words[0].lower().strip(":") in LABEL_WORDS:
+        words.pop(0)
+    return " ".join(words) or None
+
+
+def extract_with_rules(text, product_name=""):
+    """
+    Metindeki tedarikçileri kurallarla çıkarır. (tedarikçiler, çözülemeyen email'ler) döndürür.
+    Açık company_name/email çiftleri doğrudan kabul edilir; diğer email'ler için aynı satırda
+    alan adıyla eşleşen bir şirket adı aranır, bulunamazsa email çözülemeyenlere eklenir.
+    """
+    suppliers = {}
+    for match in PAIR_PATTERN.finditer(text):
+        email = match.group("email").strip().rstrip(".")
+        company = match.group("company").strip()
+        if is_valid_email(email) and company and company != "...":
+            suppliers.setdefault(email.lower(), {"company_name": company, "email": email, "product_name": product_name})
+
+    unresolved = []
+    for line in text.splitlines():
+        for match in EMAIL_PATTERN.finditer(line):
+            email = match.group(0).rstrip(".")
+            if email.lower() in suppliers or not is_valid_email(email):
+                continue
+            company = _company_before(line, match.start())
+            if company and company_matches_domain(company, email):
+                suppliers[email.lower()] = {"company_name": company, "email": email, "product_name": product_name}
+            elif email.lower() not in unresolved:
+                unresolved.append(email.lower())
+    return list(suppliers.values()), unresolved